@@ -592,7 +592,8 @@ function updateBackendSettings() {
     })
     .then(response => response.json())
     .then(data => {
-        if (data.status === 'success') {
+        // 'accepted' = settings applied, fresh data is fetched in the background (polling picks it up)
+        if (data.status === 'success' || data.status === 'accepted') {
             console.log('✅ Backend settings updated:', data.message);
         } else {
             console.error('❌ Backend settings update failed:', data.error);
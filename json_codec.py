@@ -0,0 +1,50 @@
+# ===============================================================
+# 🧾 JSON CODEC - ORJSON WHEN INSTALLED, STDLIB FALLBACK
+# ===============================================================
+
+import json
+from functools import lru_cache
+from typing import Any, Callable, Optional, Union
+
+_COMPACT = (',', ':')  # stdlib separators for non-indented output - matches orjson's compact form
+
+try:
+    import orjson
+except ImportError:  # orjson is optional - stdlib json is the fallback
+    orjson = None
+
+@lru_cache(maxsize=None)
+def orjson_option(indent: bool = False, sort_keys: bool = False, passthrough: bool = False) -> int:
+    """orjson option bitmask - built once per flag combination"""
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if passthrough:
+        # Let the caller's default() format datetimes/dataclasses the way stdlib users expect
+        option |= orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    return option
+
+def dumps_bytes(obj: Any, indent: bool = False, sort_keys: bool = False,
+                default: Optional[Callable] = None) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default,
+                            option=orjson_option(bool(indent), bool(sort_keys), default is not None))
+    return json.dumps(obj, indent=2 if indent else None, separators=None if indent else _COMPACT,
+                      sort_keys=sort_keys, ensure_ascii=False, default=default).encode("utf-8")
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False,
+          default: Optional[Callable] = None) -> str:
+    """Serialize obj to a JSON str"""
+    if orjson is not None:
+        return dumps_bytes(obj, indent, sort_keys, default).decode("utf-8")
+    return json.dumps(obj, indent=2 if indent else None, separators=None if indent else _COMPACT,
+                      sort_keys=sort_keys, ensure_ascii=False, default=default)
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON from str or bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -3,8 +3,11 @@
 # ===============================================================
 
 import time
+import hashlib
+import queue
 import threading
 import atexit
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 import signal
 import sys
@@ -12,7 +15,7 @@ from typing import Dict, Any
 
 # Import our modules
 import config
-from mt5_connector import mt5_connector
+from mt5_connector import mt5_connector, TF_META
 from pyramid_engine import pyramid_engine
 from web_dashboard import web_dashboard
 from storage_manager import storage_layer  # ← ADDED STORAGE
@@ -29,8 +32,15 @@ class MainLauncher:
         self.pyramid_structure = []
         self.pyramid_style = None
         
-        # Threading
-        self.collector_thread = None
+        # Threading - one shared pool runs the collector, health monitor and timer tasks
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="launcher")
+        self._collector_future = None
+        
+        # Settings changes from the dashboard - the collector fetches them off the request thread
+        self._settings_change_q = queue.Queue()
+        
+        # Fingerprint of the last processed market data (skip rebuilds on idle markets)
+        self._last_data_fp = None
         
         print("🎯 Main Launcher initialized")
 
@@ -120,12 +130,14 @@ class MainLauncher:
         web_dashboard.start_flask_server()
 
     def _load_initial_data(self) -> bool:
-        """Load initial market data (ALL timeframes) - FIXED: Uses current symbol"""
+        """Load initial market data (pyramid timeframes only) - FIXED: Uses current symbol"""
         try:
             print(f"📥 Loading initial data for {self.symbol}...")
+            loaded_at = datetime.now().isoformat()
             
-            # FIXED: Use self.symbol instead of hardcoded "EURUSD"
-            raw_data = mt5_connector.fetch_all_timeframes(self.symbol)
+            # Only the pyramid timeframes are needed to render the dashboard -
+            # the rest are fetched lazily by the dashboard or the collector loop
+            raw_data = mt5_connector.fetch_unified_data(self.symbol, self.pyramid_structure)
             
             if not raw_data:
                 print("❌ No data fetched")
@@ -133,20 +145,20 @@ class MainLauncher:
             
             # Calculate momentum analysis for all timeframes
             pyramid_data = {}
-            for tf in raw_data:
-                if not raw_data[tf].empty:
-                    pyramid_data[tf] = pyramid_engine.calculate_momentum_analysis(raw_data[tf])
+            for tf, df in raw_data.items():
+                if len(df) > 0:
+                    pyramid_data[tf] = pyramid_engine.calculate_momentum_analysis(df)
                 else:
                     print(f"⚠️  No data for {tf}")
-                    pyramid_data[tf] = raw_data[tf]
+                    pyramid_data[tf] = df
             
             # Build pyramid JSON (uses only pyramid structure for display)
-            pyramid_json = pyramid_engine.build_pyramid_json(pyramid_data)
+            pyramid_json = pyramid_engine.build_pyramid_json(pyramid_data, generated_at=loaded_at)
             
             # Save pyramid data to storage
             storage_layer.save_pyramid_data(pyramid_json)
             
-            # Update dashboard with ALL data
+            # Update dashboard with pyramid data
             web_dashboard.update_dashboard_data(raw_data, pyramid_json)
             
             print(f"✅ Initial data loaded: {len(pyramid_json.get('blocks', []))} blocks, {len(raw_data)} timeframes")
@@ -163,36 +175,48 @@ class MainLauncher:
         """Main data collection and processing loop - FIXED: Dynamic symbol support"""
         print(f"\n🚀 Starting MEGA FLOWZ Data Collector...")
         print(f"   Symbol: {self.symbol}")
-        print(f"   Pyramid: {self.pyramid_style} → {' → '.join(self.pyramid_structure)}")
+        print(f"   Pyramid: {self.pyramid_style} → {' → '.join(f'{tf} ({TF_META[tf].minutes}m)' for tf in self.pyramid_structure)}")
         print(f"   All Timeframes: {', '.join(config.ALL_TIMEFRAMES)}")
         print(f"   Fetch interval: {self.fetch_interval}s")
         print(f"   Dashboard URL: http://127.0.0.1:{web_dashboard.dashboard_port}")
         print(f"   Press Ctrl+C to stop\n")
         
         # Open browser after a short delay
-        threading.Timer(2, web_dashboard.open_browser).start()
+        self._executor.submit(self._open_browser_delayed, 2)
+        
+        # Steady state: only the per-update summary line is printed, not every fetch
+        mt5_connector.quiet_mode = True
         
         iteration = 1
         while not self.stop_event.is_set():
-            # Wait for next cycle
-            time.sleep(self.fetch_interval)
-            if self.stop_event.is_set():
+            # Wait for next cycle - a settings change (or shutdown) wakes the loop early
+            if self._wait_for_next_cycle():
                 break
                 
             try:
+                # One timestamp per cycle - stamped on everything this cycle builds
+                cycle_at = datetime.now().isoformat()
+                
                 # FIXED: Use current symbol dynamically (supports symbol changes)
                 current_symbol = self.symbol
                 raw_data = mt5_connector.fetch_all_timeframes(current_symbol)
                 
                 if raw_data:
+                    # Nothing moved since the last cycle (closed market / weekend) - keep current pyramid
+                    data_fp = self._data_fingerprint(current_symbol, raw_data)
+                    if data_fp == self._last_data_fp:
+                        print(f"⏸️  Update #{iteration} @ {time.strftime('%H:%M:%S')} - market unchanged, pyramid reused")
+                        iteration += 1
+                        continue
+                    
                     # Process data through pyramid engine
                     pyramid_data = {}
-                    for tf in raw_data:
-                        if not raw_data[tf].empty:
-                            pyramid_data[tf] = pyramid_engine.calculate_momentum_analysis(raw_data[tf])
+                    for tf, df in raw_data.items():
+                        if len(df) > 0:
+                            pyramid_data[tf] = pyramid_engine.calculate_momentum_analysis(df)
                     
                     # Build pyramid JSON (only shows pyramid structure)
-                    pyramid_json = pyramid_engine.build_pyramid_json(pyramid_data)
+                    pyramid_json = pyramid_engine.build_pyramid_json(pyramid_data, generated_at=cycle_at)
                     
                     # Save to storage
                     storage_layer.save_pyramid_data(pyramid_json)
@@ -200,14 +224,50 @@ class MainLauncher:
                     # Update dashboard with ALL data
                     web_dashboard.update_dashboard_data(raw_data, pyramid_json)
                     
-                    print(f"✅ Update #{iteration} @ {datetime.now().strftime('%H:%M:%S')} - {len(pyramid_json.get('blocks', []))} blocks, {len(raw_data)} TFs")
+                    self._last_data_fp = data_fp
+                    print(f"✅ Update #{iteration} @ {time.strftime('%H:%M:%S')} - {len(pyramid_json.get('blocks', []))} blocks, {len(raw_data)} TFs")
                     iteration += 1
                 else:
                     print(f"❌ Update #{iteration} failed - no data")
                     
             except Exception as e:
                 print(f"❌ Update error: {e}")
-                time.sleep(60)  # Wait longer on error
+                if self.stop_event.wait(60):  # Wait longer on error
+                    break
+
+    def queue_settings_change(self, settings: Dict[str, Any]):
+        """Ask the collector for an immediate fetch after a dashboard settings change"""
+        self._settings_change_q.put(settings)
+
+    def _wait_for_next_cycle(self) -> bool:
+        """Sleep until the fetch interval elapses or a settings change arrives - True on shutdown"""
+        try:
+            self._settings_change_q.get(timeout=self.fetch_interval)
+        except queue.Empty:
+            return self.stop_event.is_set()
+        if self.stop_event.is_set():
+            return True
+        
+        # Collapse a burst of changes into one fetch; force a rebuild even if candles are unchanged
+        while True:
+            try:
+                self._settings_change_q.get_nowait()
+            except queue.Empty:
+                break
+        self._last_data_fp = None
+        print(f"🚀 Immediate fetch triggered for: {self.symbol}")
+        return False
+
+    def _data_fingerprint(self, symbol: str, raw_data: Dict[str, Any]) -> str:
+        """Hash the newest candle of every timeframe plus the pyramid setup"""
+        fp = hashlib.blake2b(f"{symbol}|{pyramid_engine.pyramid_style}|{pyramid_engine.base_tf}".encode(), digest_size=8)
+        for tf, df in raw_data.items():
+            fp.update(tf.encode())
+            if len(df) > 0:
+                for col in ("time", "high", "low", "close", "tick_volume"):
+                    if col in df:
+                        fp.update(df[col].values[:1].tobytes())
+        return fp.hexdigest()
 
     # ===========================================================
     # 🎮 SYSTEM CONTROL
@@ -217,16 +277,19 @@ class MainLauncher:
         if self.running:
             print("⚠️  System already running")
             return
+        
+        # Flush buffered console output once per second
+        self._executor.submit(self._stdout_flusher, 1.0)
             
         if not self.initialize_system():
             print("❌ System failed to initialize")
+            self.stop_event.set()  # Release the flusher task
             return
             
         self.running = True
         
-        # Start collector thread
-        self.collector_thread = threading.Thread(target=self.collector_loop, daemon=True)
-        self.collector_thread.start()
+        # Start collector task
+        self._collector_future = self._executor.submit(self.collector_loop)
         
         # Start health monitoring
         self._start_health_monitoring()
@@ -243,11 +306,13 @@ class MainLauncher:
 
     def stop(self):
         """Stop the system gracefully"""
+        # Always release the background tasks - a signal during init arrives before running is set
+        self.stop_event.set()
+        self._settings_change_q.put(None)  # wake the collector
         if not self.running:
             return
             
         print("\n⏹️  Shutdown signal received...")
-        self.stop_event.set()
         self.running = False
         
         self._shutdown_system()
@@ -256,27 +321,41 @@ class MainLauncher:
         """Start background health monitoring"""
         def health_monitor():
             check_count = 0
+            started = time.monotonic()
             while not self.stop_event.is_set():
-                time.sleep(30)  # Check every 30 seconds
-                if self.stop_event.is_set():
+                if self.stop_event.wait(30):  # Check every 30 seconds
                     break
                     
                 mt5_health = "connected" if mt5_connector.connected else "disconnected"
                 blocks_count = len(pyramid_engine.latest_pyramid.get('blocks', []))
                 
-                print(f"❤️  Health Check #{check_count}: MT5={mt5_health}, Blocks={blocks_count}, Uptime: {check_count * 30}s")
+                print(f"❤️  Health Check #{check_count}: MT5={mt5_health}, Blocks={blocks_count}, Uptime: {int(time.monotonic() - started)}s")
                 check_count += 1
         
-        health_thread = threading.Thread(target=health_monitor, daemon=True)
-        health_thread.start()
+        self._executor.submit(health_monitor)
+
+    def _stdout_flusher(self, interval: float):
+        """Periodically flush stdout (block-buffered, see entry point) until shutdown"""
+        while not self.stop_event.wait(interval):
+            sys.stdout.flush()
+        sys.stdout.flush()
+
+    def _open_browser_delayed(self, delay: float):
+        """Open the dashboard in a browser after a delay (skipped on shutdown)"""
+        if not self.stop_event.wait(delay):
+            web_dashboard.open_browser()
 
     def _shutdown_system(self):
         """Perform complete system shutdown"""
         print("\n🔴 Initiating system shutdown...")
         
-        # Stop collector thread
-        if self.collector_thread and self.collector_thread.is_alive():
-            self.collector_thread.join(timeout=5)
+        # Stop collector task and release pool workers
+        if self._collector_future and not self._collector_future.done():
+            wait([self._collector_future], timeout=5)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        
+        # Write out any pyramid still waiting in the debounced writer
+        storage_layer.flush_pending_writes()
         
         # Shutdown MT5
         mt5_connector.safe_shutdown()
@@ -315,6 +394,11 @@ def signal_handler(signum, frame):
 
 def safe_shutdown():
     """Safe shutdown procedure"""
+    try:
+        # Pool workers are non-daemon - make sure every long-lived task sees the stop signal
+        launcher.stop_event.set()
+    except NameError:
+        pass
     try:
         mt5_connector.safe_shutdown()
         print("🔌 Safe shutdown completed")
@@ -330,6 +414,10 @@ signal.signal(signal.SIGTERM, signal_handler)
 # 🎬 APPLICATION ENTRY POINT
 # ===============================================================
 if __name__ == "__main__":
+    # Batch console writes instead of flushing every line - MainLauncher flushes once per second
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(line_buffering=False, write_through=False)
+    
     launcher = MainLauncher()
     
     try:
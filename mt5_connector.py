@@ -3,24 +3,69 @@
 # ===============================================================
 
 import MetaTrader5 as mt5
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
-from typing import Dict, List, Optional
+import bisect
+import threading
+from typing import Dict, List, NamedTuple, Optional
 import config
 
+# Immutable snapshots of config constants used on the fetch path
+_ALL_TIMEFRAMES = tuple(config.ALL_TIMEFRAMES)
+_SYMBOL_CANDIDATE_SUFFIXES = ('',) + tuple(sfx for sfx in config.SYMBOL_SUFFIXES if sfx)
+
+# Seconds an unresolvable symbol is remembered before probing the broker again
+_SYMBOL_MISS_TTL = 300.0
+
+# Candle fields consumed downstream (spread / real_volume are never read)
+_CANDLE_COLUMNS = ("time", "open", "high", "low", "close", "tick_volume")
+
+class TimeframeMeta(NamedTuple):
+    """Per-timeframe metadata - read-only, shared by every module"""
+    name: str
+    minutes: int
+    mt5_code: int
+
+# Consolidated per-timeframe metadata (duration, MT5 constant resolved once at import)
+TF_META = {
+    name: TimeframeMeta(
+        name=name,
+        minutes=int(config.TIMEFRAME_DURATIONS[name]),
+        mt5_code=getattr(mt5, f"TIMEFRAME_{name}")
+    )
+    for name in _ALL_TIMEFRAMES
+}
+
+# The MetaTrader5 binding does not document thread safety - every terminal call goes through
+# this lock (collector, Flask and health threads all reach MT5), so fetches run sequentially
+_MT5_LOCK = threading.Lock()
+
 class MT5Connector:
     def __init__(self):
         # Core configuration
         self.symbol = None
         self.timeframe = None
         self.utc_offset = 0
+        self._utc_offset_ns = np.int64(0)   # utc_offset pre-scaled for candle timestamps
         self.quiet_mode = False
         self.timeframes = {}
+        self._resolved_symbol = None    # MT5 name of self.symbol (suffix already detected)
+        
+        # Per-timeframe refresh cache for fetch_all_timeframes
+        self._last_fetch = {}           # timeframe -> monotonic time of last successful fetch
+        self._last_df = {}              # timeframe -> last fetched DataFrame
+        self._last_fetch_symbol = None  # MT5 symbol the cache belongs to
         
         # MT5 state
         self.connected = False
-        self.available_symbols = []
+        self.available_symbols = []     # Full broker symbol list - loaded on demand
+        self._symbols_loaded = False
+        self._sorted_symbols = []       # Sorted names for prefix lookups
+        self._suffix_cache = {}         # base_symbol -> resolved MT5 symbol
+        self._suffix_misses = {}        # base_symbol -> monotonic time of the last failed resolution
+        self._selected = set()          # Symbols already selected & verified in MT5
         
         print("🔌 MT5 Connector initialized")
 
@@ -29,19 +74,30 @@ class MT5Connector:
     # ===========================================================
     def initialize_mt5(self) -> bool:
         """Initialize MT5 connection"""
-        if not mt5.initialize():
+        with _MT5_LOCK:
+            initialized = mt5.initialize()
+        if not initialized:
             raise Exception("❌ Failed to initialize MT5")
+        self._suffix_misses.clear()  # fresh connection - the broker may list new symbols
         if not self.quiet_mode:
             print("✅ Connected to MT5")
         self.connected = True
-        self._load_available_symbols()
         return True
 
+    def get_all_symbols(self) -> List[str]:
+        """Get every symbol the broker offers (e.g. for symbol pickers) - loaded once on first use"""
+        if not self._symbols_loaded:
+            self._load_available_symbols()
+        return self.available_symbols
+
     def _load_available_symbols(self):
         """Load available symbols from MT5"""
         try:
-            symbols = mt5.symbols_get()
+            with _MT5_LOCK:
+                symbols = mt5.symbols_get()
             self.available_symbols = [s.name for s in symbols] if symbols else []
+            self._sorted_symbols = sorted(self.available_symbols)
+            self._symbols_loaded = True
             print(f"📋 Loaded {len(self.available_symbols)} available symbols")
         except Exception as e:
             print(f"❌ Error loading symbols: {e}")
@@ -49,8 +105,10 @@ class MT5Connector:
     def safe_shutdown(self):
         """Safely shutdown MT5 connection"""
         if self.connected:
-            mt5.shutdown()
+            with _MT5_LOCK:
+                mt5.shutdown()
             self.connected = False
+            self._selected.clear()
             print("🔌 MT5 connection closed")
 
     # ===========================================================
@@ -61,37 +119,69 @@ class MT5Connector:
         # Remove any slashes for MT5 symbol format
         base_symbol = base_symbol.replace('/', '')
         
-        if base_symbol in self.available_symbols:
+        cached = self._suffix_cache.get(base_symbol)
+        if cached is not None:
+            return cached
+        
+        # Recently failed - skip the probes and the symbol-list scan until the TTL runs out
+        missed_at = self._suffix_misses.get(base_symbol)
+        if missed_at is not None and time.monotonic() - missed_at < _SYMBOL_MISS_TTL:
             return base_symbol
-            
-        for suffix in config.SYMBOL_SUFFIXES:
+        
+        # Probe the broker directly for each candidate name - no full symbol dump needed
+        for suffix in _SYMBOL_CANDIDATE_SUFFIXES:
             test_symbol = base_symbol + suffix
-            if test_symbol in self.available_symbols:
-                print(f"🔍 Detected symbol: {base_symbol} → {test_symbol}")
+            with _MT5_LOCK:
+                info = mt5.symbol_info(test_symbol)
+            if info is not None:
+                if suffix:
+                    print(f"🔍 Detected symbol: {base_symbol} → {test_symbol}")
+                self._suffix_cache[base_symbol] = test_symbol
                 return test_symbol
-                
+        
+        # Unusual broker naming - fall back to the (lazily loaded) symbol list
+        self.get_all_symbols()
+        
+        # Prefix lookup on the sorted symbol index (e.g. EURUSD → EURUSDmicro)
+        pos = bisect.bisect_left(self._sorted_symbols, base_symbol)
+        if pos < len(self._sorted_symbols) and self._sorted_symbols[pos].startswith(base_symbol):
+            symbol = self._sorted_symbols[pos]
+            print(f"🔍 Found similar: {base_symbol} → {symbol}")
+            self._suffix_cache[base_symbol] = symbol
+            return symbol
+        
+        # Last resort for prefixed broker names - runs once per symbol thanks to the cache
         for symbol in self.available_symbols:
             if base_symbol in symbol:
                 print(f"🔍 Found similar: {base_symbol} → {symbol}")
+                self._suffix_cache[base_symbol] = symbol
                 return symbol
-                
+        
+        self._suffix_misses[base_symbol] = time.monotonic()
         return base_symbol
 
     def verify_symbol(self, symbol: str) -> bool:
         """Verify symbol exists and is selected in MT5"""
         if not self.connected:
             return False
+        
+        # Already selected on an earlier configure - no terminal round-trip needed
+        if symbol in self._selected:
+            return True
             
         # Ensure symbol is selected in MT5
-        if not mt5.symbol_select(symbol, True):
+        with _MT5_LOCK:
+            selected = mt5.symbol_select(symbol, True)
+            symbol_info = mt5.symbol_info(symbol) if selected else None
+        if not selected:
             print(f"❌ Failed to select symbol: {symbol}")
             return False
             
-        symbol_info = mt5.symbol_info(symbol)
         if not symbol_info:
             print(f"❌ Symbol info not available: {symbol}")
             return False
             
+        self._selected.add(symbol)
         print(f"✅ Symbol verified: {symbol}")
         return True
 
@@ -108,12 +198,14 @@ class MT5Connector:
             self.symbol = base_symbol  # FIXED: Keep ORIGINAL symbol for cache
             print(f"🔧 Configuring: {base_symbol} → {detected_symbol} (MT5), cache: {base_symbol}")
         else:
+            detected_symbol = base_symbol
             self.symbol = base_symbol
             print(f"🔧 Configuring with symbol: {base_symbol}")
         
         # Verify the DETECTED symbol for MT5
         if not self.verify_symbol(detected_symbol):
             raise Exception(f"❌ Symbol {detected_symbol} not found")
+        self._resolved_symbol = detected_symbol
     
         # Get pyramid structure from style
         pyramid_style = settings.get('pyramid_style', 'daily')
@@ -123,11 +215,11 @@ class MT5Connector:
         pyramid_name, pyramid_structure = config.PYRAMID_STYLES[pyramid_style]
     
         # Set timeframe mappings for pyramid
-        self.timeframes = {}
-        for tf in pyramid_structure:
-            self.timeframes[tf] = getattr(mt5, f"TIMEFRAME_{tf}")
+        self.timeframes = {tf: TF_META[tf].mt5_code for tf in pyramid_structure}
     
         self.utc_offset = settings.get('utc_offset', 0)
+        self._utc_offset_ns = np.int64(round(self.utc_offset * 3600)) * 1_000_000_000
+        self._invalidate_timeframe_cache()
     
         print(f"✅ Auto-configured: {self.symbol}, {pyramid_name}")
         return pyramid_structure, pyramid_name
@@ -135,54 +227,129 @@ class MT5Connector:
     # ===========================================================
     # 📊 DATA FETCHING - UNIVERSAL SYMBOL SUPPORT
     # ===========================================================
-    def fetch_timeframe_data(self, symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
+    def _resolve_symbol(self, symbol: str) -> str:
+        """Get MT5 symbol name - reuses the configured resolution for the current symbol"""
+        if symbol == self.symbol and self._resolved_symbol:
+            return self._resolved_symbol
+        return self.detect_symbol_suffix(symbol)
+
+    def fetch_timeframe_data(self, symbol: str, timeframe: str) -> pd.DataFrame:
         """Fetch 200 candles for timeframe using the symbol parameter"""
+        # Use detected symbol for MT5 API calls
+        return self._fetch_timeframe_data_resolved(self._resolve_symbol(symbol), timeframe)
+
+    def _fetch_timeframe_data_resolved(self, actual_symbol: str, timeframe: str) -> pd.DataFrame:
+        """Fetch 200 candles for timeframe using an already-resolved MT5 symbol (empty frame on failure)"""
         if not self.connected:
             print("❌ MT5 not connected")
-            return None
+            return pd.DataFrame()
 
-        mt5_tf = getattr(mt5, f"TIMEFRAME_{timeframe}", None)
-        if not mt5_tf:
+        meta = TF_META.get(timeframe)
+        if meta is None:
             print(f"❌ Invalid timeframe: {timeframe}")
-            return None
+            return pd.DataFrame()
+        mt5_tf = meta.mt5_code
 
-        # Use detected symbol for MT5 API calls
-        actual_symbol = self.detect_symbol_suffix(symbol)
-        print(f"📥 Fetching {actual_symbol} {timeframe} (200 candles)...")
-
-        rates = mt5.copy_rates_from_pos(actual_symbol, mt5_tf, 0, 200)
+        with _MT5_LOCK:
+            rates = mt5.copy_rates_from_pos(actual_symbol, mt5_tf, 0, 200)
         if rates is None or len(rates) == 0:
             print(f"⚠️ Primary method failed, trying fallback for {actual_symbol}/{timeframe}")
             current_time = datetime.now()
-            rates = mt5.copy_rates_from(actual_symbol, mt5_tf, current_time, 200)
+            with _MT5_LOCK:
+                rates = mt5.copy_rates_from(actual_symbol, mt5_tf, current_time, 200)
 
         if rates is None or len(rates) == 0:
             print(f"❌ Failed to fetch data for {actual_symbol}/{timeframe}")
-            return None
+            return pd.DataFrame()
 
-        df = pd.DataFrame(rates)
-        df["time"] = pd.to_datetime(df["time"], unit='s') + timedelta(hours=self.utc_offset)
-        df = df.sort_values("time", ascending=False).reset_index(drop=True)
-        print(f"✅ Fetched {len(df)} candles for {timeframe}")
+        df = self._rates_to_frame(rates)
+        if not self.quiet_mode:
+            print(f"✅ Fetched {len(df)} candles for {timeframe}")
         return df
 
+    def _rates_to_frame(self, rates: np.ndarray) -> pd.DataFrame:
+        """MT5 rates array -> newest-first candle frame"""
+        # MT5 returns candles oldest-first - reverse the view (newest first) instead of sorting,
+        # and build the frame column-wise from only the fields we use
+        rates = rates[::-1]
+        columns = {col: rates[col] for col in _CANDLE_COLUMNS}
+        
+        # Epoch seconds -> shifted datetime64[ns] in one integer pass (no pandas datetime parsing)
+        times_ns = rates["time"].astype(np.int64) * 1_000_000_000 + self._utc_offset_ns
+        columns["time"] = times_ns.view("datetime64[ns]")
+        return pd.DataFrame(columns)
+
+    def _refresh_forming_bar(self, actual_symbol: str, timeframe: str, cached: pd.DataFrame) -> pd.DataFrame:
+        """Splice the newest 2 candles into a cached frame - keeps the forming bar live between full refetches"""
+        with _MT5_LOCK:
+            rates = mt5.copy_rates_from_pos(actual_symbol, TF_META[timeframe].mt5_code, 0, 2)
+        if rates is None or len(rates) == 0:
+            return cached
+        
+        latest = self._rates_to_frame(rates)
+        cached_times = cached["time"].to_numpy()
+        oldest_new = latest["time"].to_numpy()[-1]
+        if oldest_new > cached_times[0]:
+            # Several candles opened since the cached fetch - splicing would leave a gap
+            full = self._fetch_timeframe_data_resolved(actual_symbol, timeframe)
+            return full if len(full) > 0 else cached
+        
+        # Cached rows at or after the oldest new candle are replaced (frames are newest first)
+        replaced = int(np.count_nonzero(cached_times >= oldest_new))
+        head = cached.iloc[:replaced]
+        if replaced == len(latest) and all(
+                np.array_equal(head[col].to_numpy(), latest[col].to_numpy()) for col in _CANDLE_COLUMNS):
+            return cached  # Nothing ticked - keep the same frame object
+        
+        older = cached.iloc[replaced:][list(_CANDLE_COLUMNS)]
+        return pd.concat([latest, older], ignore_index=True).iloc[:len(cached)]
+
+    def _fetch_many(self, symbol: str, timeframes: List[str]) -> Dict[str, pd.DataFrame]:
+        """Fetch several timeframes (sequential - terminal calls are serialized by _MT5_LOCK anyway)"""
+        # Resolve the MT5 symbol once for the whole batch
+        actual_symbol = self._resolve_symbol(symbol)
+        return {tf_name: self._fetch_timeframe_data_resolved(actual_symbol, tf_name) for tf_name in timeframes}
+
     def fetch_unified_data(self, symbol: str, pyramid_structure: List[str]) -> Dict[str, pd.DataFrame]:
         """Fetch 200 candles for all timeframes in pyramid structure using symbol parameter"""
-        data = {}
-        for tf_name in pyramid_structure:
-            df = self.fetch_timeframe_data(symbol, tf_name)
-            data[tf_name] = df if df is not None else pd.DataFrame()
-        return data
+        return self._fetch_many(symbol, pyramid_structure)
 
     def fetch_all_timeframes(self, symbol: str) -> Dict[str, pd.DataFrame]:
-        """Fetch 200 candles for all timeframes using symbol parameter"""
+        """Fetch 200 candles for all timeframes - slow timeframes only refresh their newest bars until half a candle has passed"""
+        actual_symbol = self._resolve_symbol(symbol)
+        if actual_symbol != self._last_fetch_symbol:
+            self._invalidate_timeframe_cache()
+            self._last_fetch_symbol = actual_symbol
+        
+        # Refetch a timeframe only once half of its candle duration has elapsed
+        now = time.monotonic()
+        due = [tf for tf in _ALL_TIMEFRAMES
+               if tf not in self._last_df or now - self._last_fetch[tf] >= TF_META[tf].minutes * 60 * 0.5]
+        
+        fresh = self._fetch_many(symbol, due)
         data = {}
-        for tf_name in config.ALL_TIMEFRAMES:
-            df = self.fetch_timeframe_data(symbol, tf_name)
-            data[tf_name] = df if df is not None else pd.DataFrame()
-        print(f"📊 Fetched all timeframes for {symbol}")
+        for tf in _ALL_TIMEFRAMES:
+            df = fresh.get(tf)
+            if df is not None and len(df) > 0:
+                self._last_fetch[tf] = now
+                self._last_df[tf] = df
+            elif tf in self._last_df:
+                # Not due (or the due fetch failed) - keep the history, refresh the forming bar
+                df = self._last_df[tf] = self._refresh_forming_bar(actual_symbol, tf, self._last_df[tf])
+            elif df is None:
+                df = pd.DataFrame()
+            data[tf] = df
+        
+        if not self.quiet_mode:
+            print(f"📊 Fetched {len(due)}/{len(data)} timeframes for {symbol}")
         return data
 
+    def _invalidate_timeframe_cache(self):
+        """Drop cached timeframe data (symbol or settings changed)"""
+        self._last_fetch = {}
+        self._last_df = {}
+        self._last_fetch_symbol = None
+
     # ===========================================================
     # 📈 REAL-TIME DATA
     # ===========================================================
@@ -192,7 +359,8 @@ class MT5Connector:
             return None
         # Use detected symbol for MT5 call
         actual_symbol = self.detect_symbol_suffix(symbol)
-        tick = mt5.symbol_info_tick(actual_symbol)
+        with _MT5_LOCK:
+            tick = mt5.symbol_info_tick(actual_symbol)
         return tick.bid if tick else None
 
     def get_symbol_info(self, symbol: str) -> Optional[Dict]:
@@ -201,7 +369,8 @@ class MT5Connector:
             return None
         # Use detected symbol for MT5 call
         actual_symbol = self.detect_symbol_suffix(symbol)
-        info = mt5.symbol_info(actual_symbol)
+        with _MT5_LOCK:
+            info = mt5.symbol_info(actual_symbol)
         if info:
             return {
                 'name': info.name,
@@ -218,9 +387,14 @@ class MT5Connector:
     # ===========================================================
     def health_check(self) -> Dict:
         """Return connector health status"""
+        # Broker symbol count straight from the terminal - the full list is only loaded on demand
+        symbols_total = 0
+        if self.connected:
+            with _MT5_LOCK:
+                symbols_total = mt5.symbols_total() or 0
         return {
             'connected': self.connected,
-            'symbols_loaded': len(self.available_symbols),
+            'symbols_loaded': symbols_total,
             'current_symbol': self.symbol,
             'last_check': datetime.now().isoformat()
         }
@@ -2,12 +2,107 @@
 # 🏗️ PYRAMID ENGINE - ENHANCED WITH MULTI-SYMBOL CACHE
 # ===============================================================
 
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-import json
 import os
+import shutil
+import bisect
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, List, Any, Optional
 import config
+import json_codec
+from mt5_connector import TF_META
+
+try:
+    from numba import njit, prange
+    _NUMBA_AVAILABLE = True
+except ImportError:  # numba is optional - the pandas paths below are used instead
+    _NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in so the kernels still define without numba"""
+        return lambda func: func
+
+# Narrow dtypes for cached candle columns - prices stay float64 (float32 can't hold
+# 5-decimal FX quotes or 100k+ crypto prices exactly, and the noise leaks into indicators)
+_CACHE_DTYPES = {"tick_volume": "int32"}
+
+_EPOCH = datetime(1970, 1, 1)
+_MINUTE = timedelta(minutes=1)
+
+@lru_cache(maxsize=4096)
+def _time_range_cached(epoch_minute: int, tf: str) -> str:
+    """Format a time range once per (minute, timeframe) - candle times repeat every cycle"""
+    t = _EPOCH + timedelta(minutes=epoch_minute)
+    fmt = config.CHART_CONFIG['time_range_formats'].get(tf, "%H:%M")
+    start = t.strftime(fmt)
+    
+    if tf == "D1": 
+        return f"[{start}]"
+        
+    meta = TF_META.get(tf)
+    end_min = meta.minutes - 1 if meta else 0  # last minute covered by the bar
+    end = (t + timedelta(minutes=end_min)).strftime("%H:%M")
+    return f"[{start}-{end}]" if tf != "M1" else f"[{start}]"
+
+# ===============================================================
+# ⚡ FUSED INDICATOR KERNELS (numba, optional)
+# ===============================================================
+@njit(cache=True)
+def _wilder_kernel(values, period):
+    """Wilder smoothing in one pass (same as ewm(alpha=1/period, adjust=False))"""
+    n = values.shape[0]
+    out = np.empty(n)
+    for i in range(n):
+        if i == 0:
+            out[i] = values[i]
+        else:
+            out[i] = out[i - 1] + (values[i] - out[i - 1]) / period
+    return out
+
+@njit(cache=True, parallel=True)
+def _multi_ema_kernel(values, spans):
+    """Several ewm(span=s, adjust=False) means over the same array, one row per span"""
+    n = values.shape[0]
+    out = np.empty((spans.shape[0], n))
+    for k in prange(spans.shape[0]):
+        alpha = 2.0 / (spans[k] + 1.0)
+        ema = values[0]
+        for i in range(n):
+            ema = alpha * values[i] + (1.0 - alpha) * ema
+            out[k, i] = ema
+    return out
+
+@njit(cache=True)
+def _rsi_kernel(close, period):
+    """Gain/loss split + rolling-mean RSI in one pass (min_periods=1 semantics)"""
+    n = close.shape[0]
+    gain = np.zeros(n)
+    loss = np.zeros(n)
+    rsi = np.empty(n)
+    for i in range(n):
+        if i > 0:
+            delta = close[i] - close[i - 1]
+            if delta > 0:
+                gain[i] = delta
+            elif delta < 0:
+                loss[i] = -delta
+        start = max(0, i - period + 1)
+        gain_sum = 0.0
+        loss_sum = 0.0
+        for j in range(start, i + 1):
+            gain_sum += gain[j]
+            loss_sum += loss[j]
+        count = i - start + 1
+        avg_loss = loss_sum / count
+        if avg_loss == 0:
+            avg_loss = 0.00001  # Avoid division by zero
+        rsi[i] = 100 - (100 / (1 + (gain_sum / count) / avg_loss))
+    return rsi
 
 class PyramidEngine:
     def __init__(self):
@@ -22,7 +117,12 @@ class PyramidEngine:
         # Multi-symbol cache - NEW
         self.pyramid_cache = {}      # symbol -> pyramid_data
         self.raw_data_cache = {}     # symbol -> raw_data
+        self._cache_lock = threading.Lock()  # raw_data_cache writes (collector + Flask lazy loads)
         self.current_symbol = None
+        self._pyramid_fingerprint = {}  # symbol -> (input fingerprint, built pyramid)
+        self._indicator_cache = OrderedDict()  # (symbol, tf, bar fingerprint, periods) -> indicator frame (LRU)
+        self._indicator_cache_size = 32
+        self._indicator_lock = threading.Lock()  # shared by the collector and Flask worker threads
         
         # Legacy single-symbol state (for backward compatibility)
         self.latest_pyramid = {}
@@ -47,47 +147,69 @@ class PyramidEngine:
     # ===========================================================
     # 🔄 MULTI-SYMBOL CACHE MANAGEMENT - NEW
     # ===========================================================
-    def get_pyramid_for_symbol(self, symbol: str) -> Dict[str, Any]:
+    def get_pyramid_for_symbol(self, symbol: str, generated_at: Optional[str] = None) -> Dict[str, Any]:
         """Get cached pyramid for specific symbol - lazy initialization"""
         if symbol in self.pyramid_cache:
             return self.pyramid_cache[symbol]
         else:
             # Lazy initialization - create empty pyramid for new symbol
             print(f"🆕 First request for {symbol}, creating empty pyramid cache")
-            empty_pyramid = self._create_empty_pyramid()
+            empty_pyramid = self._create_empty_pyramid(generated_at)
             empty_pyramid['symbol'] = symbol
             self.pyramid_cache[symbol] = empty_pyramid
             return empty_pyramid
 
     def get_raw_data_for_symbol(self, symbol: str) -> Dict[str, pd.DataFrame]:
         """Get cached raw data for specific symbol"""
-        if symbol in self.raw_data_cache:
-            return self.raw_data_cache[symbol]
-        else:
+        with self._cache_lock:
+            if symbol in self.raw_data_cache:
+                return self.raw_data_cache[symbol]
             # Create empty raw data structure
             empty_data = {tf: pd.DataFrame() for tf in config.ALL_TIMEFRAMES}
             self.raw_data_cache[symbol] = empty_data
             return empty_data
 
+    def store_timeframe_data(self, symbol: str, timeframe: str, df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """Add one lazily fetched timeframe to the symbol's raw data - returns the updated raw data"""
+        df = self._compact_frame(df)
+        with self._cache_lock:
+            # Copy-on-write: readers holding the previous dict never see it change
+            raw_data = dict(self.raw_data_cache.get(symbol, {}))
+            raw_data[timeframe] = df
+            self.raw_data_cache[symbol] = raw_data
+            if symbol == self.current_symbol:
+                self.latest_raw_data = raw_data
+        return raw_data
+
     def update_symbol_data(self, symbol: str, raw_data: Dict[str, pd.DataFrame], pyramid_data: Dict[str, Any]):
         """Update cache for specific symbol"""
-        # Update multi-symbol cache
-        self.pyramid_cache[symbol] = pyramid_data
-        self.raw_data_cache[symbol] = raw_data
+        # Tick volume is stored narrow; prices keep full float64 precision
+        raw_data = {tf: self._compact_frame(df) for tf, df in raw_data.items()}
         
-        # Update current symbol for backward compatibility
-        if symbol == self.current_symbol:
-            self.latest_pyramid = pyramid_data
-            self.latest_raw_data = raw_data
+        # Update multi-symbol cache
+        with self._cache_lock:
+            self.pyramid_cache[symbol] = pyramid_data
+            self.raw_data_cache[symbol] = raw_data
+            
+            # Update current symbol for backward compatibility
+            if symbol == self.current_symbol:
+                self.latest_pyramid = pyramid_data
+                self.latest_raw_data = raw_data
             
         print(f"💾 Updated cache for {symbol}: {len(pyramid_data.get('blocks', []))} blocks")
 
+    @staticmethod
+    def _compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """Downcast the compactable candle columns present in df (tick volume to int32)"""
+        dtypes = {col: dtype for col, dtype in _CACHE_DTYPES.items() if col in df.columns}
+        return df.astype(dtypes) if dtypes else df
+
     def clear_symbol_cache(self, symbol: str):
         """Clear cache for specific symbol"""
-        if symbol in self.pyramid_cache:
-            del self.pyramid_cache[symbol]
-        if symbol in self.raw_data_cache:
-            del self.raw_data_cache[symbol]
+        with self._cache_lock:
+            self.pyramid_cache.pop(symbol, None)
+            self.raw_data_cache.pop(symbol, None)
+        self._pyramid_fingerprint.pop(symbol, None)
         print(f"🧹 Cleared cache for {symbol}")
 
     def get_cached_symbols(self) -> List[str]:
@@ -101,7 +223,8 @@ class PyramidEngine:
         """Calculate momentum indicators and candle analysis"""
         # Simple direction based on close vs open
         df["Momentum"] = df["close"] - df["open"]
-        df["Dir"] = df["Momentum"].apply(lambda x: "🟢" if x > 0 else "🔴" if x < 0 else "⚪")
+        mom = df["Momentum"].to_numpy()
+        df["Dir"] = np.select([mom > 0, mom < 0], ["🟢", "🔴"], default="⚪").astype(object)
         
         # Momentum Acceleration
         df["Momentum_Acceleration"] = (df["close"] - df["close"].shift(1)) - (df["close"].shift(1) - df["close"].shift(2))
@@ -117,12 +240,20 @@ class PyramidEngine:
         range_denominator = range_denominator.replace(0, 0.00001)
         df["Body_Strength"] = (df["close"] - df["open"]).abs() / range_denominator
         
-        # ATR Calculation (14-period)
-        hl = df['high'] - df['low']
-        hc = (df['high'] - df['close'].shift()).abs()
-        lc = (df['low'] - df['close'].shift()).abs()
-        tr = pd.concat([hl, hc, lc], axis=1).max(axis=1)
-        df["ATR"] = tr.rolling(14, min_periods=1).mean()
+        # ATR Calculation (14-period, Wilder smoothing)
+        # Frames are newest first: the previous close is the next row, and the smoothing
+        # has to run oldest -> newest, so it works on the reversed TR and flips back
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        prev_close = df['close'].shift(-1).to_numpy(dtype=np.float64)
+        # True Range as one elementwise reduce - fmax skips the NaN previous close on the oldest bar
+        tr = np.fmax.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+        tr_oldest_first = np.ascontiguousarray(tr[::-1])
+        if _NUMBA_AVAILABLE:
+            atr = _wilder_kernel(tr_oldest_first, 14)
+        else:
+            atr = pd.Series(tr_oldest_first).ewm(alpha=1/14, adjust=False).mean().to_numpy()
+        df["ATR"] = atr[::-1]
         
         return df
 
@@ -144,102 +275,151 @@ class PyramidEngine:
         
         return f"{mom_text} | {wick_text} | {body_text} | {atr_text}"
 
+    def _build_summaries(self, df: pd.DataFrame) -> List[str]:
+        """Momentum summary text for every row at once - same output as get_momentum_summary"""
+        parts = []
+        for col, label, fmt in (("Momentum_Acceleration", "MOM", "{:+.5f}"), ("Wick_Ratio", "WICK", "{:.2f}x"),
+                                ("Body_Strength", "BODY", "{:.0%}"), ("ATR", "ATR", "{:.5f}")):
+            values = df[col].to_numpy(dtype=np.float64) if col in df.columns else np.zeros(len(df))
+            missing = f"{label}: --"
+            parts.append([missing if v != v else f"{label}: {fmt.format(v)}" for v in values.tolist()])
+        return [" | ".join(row) for row in zip(*parts)]
+
     # ===========================================================
     # 🕒 TIME RANGE FORMATTING
     # ===========================================================
     def get_time_range(self, t: datetime, tf: str) -> str:
         """Format time range for display based on timeframe"""
-        fmt = config.CHART_CONFIG['time_range_formats'].get(tf, "%H:%M")
-        start = t.strftime(fmt)
-        
-        if tf == "D1": 
-            return f"[{start}]"
-            
-        end_min = {"M1": 0, "M5": 4, "M15": 14, "H1": 59, "H4": 239}.get(tf, 0)
-        end = (t + timedelta(minutes=end_min)).strftime("%H:%M")
-        return f"[{start}-{end}]" if tf != "M1" else f"[{start}]"
+        return _time_range_cached((t - _EPOCH) // _MINUTE, tf)
 
     # ===========================================================
     # 🧩 PYRAMID JSON CONSTRUCTION - ENHANCED WITH VOLUME
     # ===========================================================
-    def build_pyramid_json(self, data: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+    def build_pyramid_json(self, data: Dict[str, pd.DataFrame], generated_at: Optional[str] = None) -> Dict[str, Any]:
         """Build complete pyramid JSON structure with volume"""
-        if self.base_tf not in data or data[self.base_tf].empty:
-            return self._create_empty_pyramid()
+        # One timestamp per build - callers updating several symbols can pass a shared one
+        if generated_at is None:
+            generated_at = datetime.now().isoformat()
             
-        base_df = data[self.base_tf].iloc[:self.extract_count]
-        blocks = []
-
-        def get_children(parent_time: datetime, parent_tf: str, level: int = 0) -> List[Dict]:
-            """Recursively get child blocks for parent timeframe"""
-            if level + 1 >= len(self.pyramid_structure): 
-                return []
-                
-            child_tf = self.pyramid_structure[level + 1]
-            if child_tf not in data or data[child_tf].empty:
-                return []
-                
-            df = data[child_tf]
-            start = parent_time
-            end = parent_time + timedelta(minutes=config.TIMEFRAME_DURATIONS[parent_tf])
+        if self.base_tf not in data or data[self.base_tf].empty:
+            return self._create_empty_pyramid(generated_at)
             
-            # Filter children within parent time range
-            children_df = df[(df["time"] >= start) & (df["time"] < end)]
-            children = []
+        # Skip the rebuild when none of the pyramid's timeframes moved since the last build
+        fp = self._pyramid_input_fingerprint(data)
+        cached = self._pyramid_fingerprint.get(self.symbol)
+        if cached is not None and cached[0] == fp:
+            # Same candles - reuse the blocks, but stamp this build's time
+            pyramid = dict(cached[1], generated=generated_at)
+            self._pyramid_fingerprint[self.symbol] = (fp, pyramid)
+            return pyramid
             
-            for _, row in children_df.iterrows():
-                child_index = df[df["time"] == row["time"]].index[0]
-                child = {
-                    "tf": child_tf,
-                    "time": row["time"].isoformat(),
-                    "range": self.get_time_range(row["time"], child_tf),
-                    "O": round(row["open"], 5),
-                    "H": round(row["high"], 5),
-                    "L": round(row["low"], 5),
-                    "C": round(row["close"], 5),
-                    "volume": int(row.get("tick_volume", 0)),  # ADDED: Volume data
-                    "dir": row["Dir"],
-                    "momentum_summary": self.get_momentum_summary(df, child_index),
-                    "children": get_children(row["time"], child_tf, level + 1)
-                }
-                children.append(child)
-            return children
-
-        # Build base blocks with volume
-        for _, row in base_df.iterrows():
-            block_index = base_df[base_df["time"] == row["time"]].index[0]
-            block = {
-                "tf": self.base_tf,
-                "time": row["time"].isoformat(),
-                "range": self.get_time_range(row["time"], self.base_tf),
-                "O": round(row["open"], 5),
-                "H": round(row["high"], 5),
-                "L": round(row["low"], 5),
-                "C": round(row["close"], 5),
-                "volume": int(row.get("tick_volume", 0)),  # ADDED: Volume data
-                "dir": row["Dir"],
-                "momentum_summary": self.get_momentum_summary(base_df, block_index),
-                "children": get_children(row["time"], self.base_tf)
+        base_count = len(data[self.base_tf].iloc[:self.extract_count])
+        levels = self.pyramid_structure
+        
+        # Columnar pass per timeframe: format/round whole ndarrays once, then tolist() -
+        # nodes below only index into plain Python lists
+        columns = {}
+        for tf in levels:
+            if tf not in data or data[tf].empty:
+                continue
+            df = data[tf]
+            time_ns = df["time"].to_numpy().astype("datetime64[ns]")
+            epoch_ns = time_ns.view(np.int64)
+            columns[tf] = {
+                "ns": epoch_ns,
+                "time": np.datetime_as_string(time_ns, unit="s").tolist(),
+                "minute": (epoch_ns // 60_000_000_000).tolist(),
+                "open": np.round(df["open"].to_numpy(dtype=np.float64), 5).tolist(),
+                "high": np.round(df["high"].to_numpy(dtype=np.float64), 5).tolist(),
+                "low": np.round(df["low"].to_numpy(dtype=np.float64), 5).tolist(),
+                "close": np.round(df["close"].to_numpy(dtype=np.float64), 5).tolist(),
+                "volume": df["tick_volume"].to_numpy().astype(np.int64).tolist() if "tick_volume" in df.columns else [0] * len(df),
+                "dir": df["Dir"].tolist(),
+                "summary": self._build_summaries(df)
             }
-            blocks.append(block)
+
+        # Hot-loop names bound as default args -> fast locals instead of global/attribute lookups
+        def make_node(tf: str, pos: int, _columns=columns, _time_range=_time_range_cached) -> Dict[str, Any]:
+            """Build one pyramid block from row position `pos` of timeframe `tf`"""
+            col = _columns[tf]
+            return {
+                "tf": tf,
+                "time": col["time"][pos],
+                "range": _time_range(col["minute"][pos], tf),
+                "O": col["open"][pos],
+                "H": col["high"][pos],
+                "L": col["low"][pos],
+                "C": col["close"][pos],
+                "volume": col["volume"][pos],  # ADDED: Volume data
+                "dir": col["dir"][pos],
+                "momentum_summary": col["summary"][pos],
+                "children": []
+            }
+
+        def child_bounds(parent_tf: str, child_tf: str):
+            """Child row slice [first, last) for every parent bar, via one vectorized binary search"""
+            # Plain int64 nanoseconds from the column pass - no datetime objects or re-conversion
+            parent_ns = columns[parent_tf]["ns"]
+            # Frames are newest-first; search an ascending view and map back to descending positions
+            child_times = columns[child_tf]["ns"][::-1]
+            duration_ns = TF_META[parent_tf].minutes * 60_000_000_000
+            lo = np.searchsorted(child_times, parent_ns, side="left")
+            hi = np.searchsorted(child_times, parent_ns + duration_ns, side="left")
+            n = len(child_times)
+            return (n - hi).tolist(), (n - lo).tolist()
+
+        # Build base blocks with volume, then attach each level of children top-down
+        blocks = [make_node(self.base_tf, pos) for pos in range(base_count)]
+        frontier = list(zip(blocks, range(base_count)))
+        
+        for level in range(len(levels) - 1):
+            parent_tf, child_tf = levels[level], levels[level + 1]
+            if child_tf not in columns:
+                break
+                
+            first, last = child_bounds(parent_tf, child_tf)
+            next_frontier = []
+            push = next_frontier.append
+            for node, pos in frontier:
+                attach = node["children"].append
+                for child_pos in range(first[pos], last[pos]):
+                    child = make_node(child_tf, child_pos)
+                    attach(child)
+                    push((child, child_pos))
+            frontier = next_frontier
 
         pyramid = {
             "symbol": self.symbol,
             "style": self.pyramid_style,
             "structure": self.pyramid_structure,
-            "generated": datetime.now().isoformat(),
+            "generated": generated_at,
             "blocks": blocks
         }
         
+        self._pyramid_fingerprint[self.symbol] = (fp, pyramid)
         return pyramid
 
-    def _create_empty_pyramid(self) -> Dict[str, Any]:
+    def _pyramid_input_fingerprint(self, data: Dict[str, pd.DataFrame]) -> tuple:
+        """Cheap identity of the pyramid inputs - length, time span and the full newest bar per timeframe"""
+        parts = [self.pyramid_style, tuple(self.pyramid_structure), self.extract_count, self.utc_offset]
+        for tf in self.pyramid_structure:
+            df = data.get(tf)
+            if df is None or len(df) == 0:
+                parts.append((tf, 0))
+                continue
+            times = df["time"]
+            # The forming bar can move high/low/volume without touching close
+            newest = tuple(df[col].iloc[0].item() for col in ("open", "high", "low", "close", "tick_volume") if col in df.columns)
+            parts.append((tf, len(df), times.iloc[0].value, times.iloc[-1].value, newest))
+        return tuple(parts)
+
+    def _create_empty_pyramid(self, generated_at: Optional[str] = None) -> Dict[str, Any]:
         """Create empty pyramid structure when no data available"""
         return {
             "symbol": self.symbol or "Unknown",
             "style": self.pyramid_style or "Unknown",
             "structure": self.pyramid_structure,
-            "generated": datetime.now().isoformat(),
+            "generated": generated_at or datetime.now().isoformat(),
             "blocks": []
         }
 
@@ -253,6 +433,9 @@ class PyramidEngine:
             if len(df) < 20:
                 return df
             
+            # New columns go on a shallow copy - the caller's frame is never modified
+            df = df.copy(deep=False)
+            
             # Use custom periods if provided, otherwise use defaults
             periods = self._get_periods(custom_periods)
                 
@@ -261,38 +444,53 @@ class PyramidEngine:
                 col_name = f'SMA_{sma_period}'
                 df[col_name] = df['close'].rolling(window=min(sma_period, len(df)), min_periods=1).mean()
             
-            # EMA - Dynamic periods  
-            for ema_period in periods['ema_periods']:
-                col_name = f'EMA_{ema_period}'
-                df[col_name] = df['close'].ewm(span=min(ema_period, len(df)), adjust=False).mean()
-            
             # MACD - Dynamic periods
             macd_fast = periods['macd_fast']
             macd_slow = periods['macd_slow']
             macd_signal = periods['macd_signal']
             
-            ema_fast = df['close'].ewm(span=min(macd_fast, len(df)), adjust=False).mean()
-            ema_slow = df['close'].ewm(span=min(macd_slow, len(df)), adjust=False).mean()
-            df['MACD'] = ema_fast - ema_slow
-            df['MACD_Signal'] = df['MACD'].ewm(span=min(macd_signal, len(df)), adjust=False).mean()
+            if _NUMBA_AVAILABLE:
+                # EMA lines + both MACD legs in one batched pass over close
+                spans = [min(p, len(df)) for p in periods['ema_periods'] + [macd_fast, macd_slow]]
+                emas = _multi_ema_kernel(df['close'].to_numpy(dtype=np.float64), np.array(spans, dtype=np.float64))
+                for row, ema_period in enumerate(periods['ema_periods']):
+                    df[f'EMA_{ema_period}'] = emas[row]
+                macd = emas[-2] - emas[-1]
+                df['MACD'] = macd
+                df['MACD_Signal'] = _multi_ema_kernel(macd, np.array([min(macd_signal, len(df))], dtype=np.float64))[0]
+            else:
+                # EMA - Dynamic periods  
+                for ema_period in periods['ema_periods']:
+                    col_name = f'EMA_{ema_period}'
+                    df[col_name] = df['close'].ewm(span=min(ema_period, len(df)), adjust=False).mean()
+                
+                ema_fast = df['close'].ewm(span=min(macd_fast, len(df)), adjust=False).mean()
+                ema_slow = df['close'].ewm(span=min(macd_slow, len(df)), adjust=False).mean()
+                df['MACD'] = ema_fast - ema_slow
+                df['MACD_Signal'] = df['MACD'].ewm(span=min(macd_signal, len(df)), adjust=False).mean()
             df['MACD_Histogram'] = df['MACD'] - df['MACD_Signal']
             
             # RSI - Dynamic period
             rsi_period = periods['rsi_period']
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=min(rsi_period, len(df)), min_periods=1).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=min(rsi_period, len(df)), min_periods=1).mean()
-            
-            # Avoid division by zero
-            rs = gain / loss.replace(0, 0.00001)
-            df['RSI'] = 100 - (100 / (1 + rs))
+            if _NUMBA_AVAILABLE:
+                df['RSI'] = _rsi_kernel(df['close'].to_numpy(dtype=np.float64), min(rsi_period, len(df)))
+            else:
+                delta = df['close'].diff()
+                gain = (delta.where(delta > 0, 0)).rolling(window=min(rsi_period, len(df)), min_periods=1).mean()
+                loss = (-delta.where(delta < 0, 0)).rolling(window=min(rsi_period, len(df)), min_periods=1).mean()
+                
+                # Avoid division by zero
+                rs = gain / loss.replace(0, 0.00001)
+                df['RSI'] = 100 - (100 / (1 + rs))
             
             # Bollinger Bands - Dynamic period
             bb_period = periods['bb_period']
-            df['BB_Middle'] = df['close'].rolling(window=min(bb_period, len(df)), min_periods=1).mean()
-            bb_std = df['close'].rolling(window=min(bb_period, len(df)), min_periods=1).std()
-            df['BB_Upper'] = df['BB_Middle'] + (bb_std.fillna(0) * 2)
-            df['BB_Lower'] = df['BB_Middle'] - (bb_std.fillna(0) * 2)
+            bb_roll = df['close'].rolling(window=min(bb_period, len(df)), min_periods=1)  # one window for mean + std
+            bb_middle = bb_roll.mean()
+            bb_band = bb_roll.std().fillna(0) * 2
+            df['BB_Middle'] = bb_middle
+            df['BB_Upper'] = bb_middle + bb_band
+            df['BB_Lower'] = bb_middle - bb_band
             
             # ADDED: Stochastic Oscillator
             stoch_k = periods.get('stoch_k', 14)
@@ -308,17 +506,48 @@ class PyramidEngine:
             
             # ADDED: Support/Resistance Levels
             sr_levels = self.calculate_support_resistance(df)
-            df['Support_Levels'] = [sr_levels['support']] * len(df)
-            df['Resistance_Levels'] = [sr_levels['resistance']] * len(df)
+            # Stored once as frame metadata instead of a per-row list column
+            df.attrs['support_levels'] = sr_levels['support']
+            df.attrs['resistance_levels'] = sr_levels['resistance']
             
-            # Fill NaN values
-            self._fill_indicator_nans(df)
+            # Fill NaN values - column list is known from the periods, no df.columns scan
+            indicator_columns = list(dict.fromkeys(
+                [f'SMA_{p}' for p in periods['sma_periods']] +
+                [f'EMA_{p}' for p in periods['ema_periods']] +
+                ['MACD', 'MACD_Signal', 'MACD_Histogram', 'RSI',
+                 'BB_Middle', 'BB_Upper', 'BB_Lower', 'Stoch_%K', 'Stoch_%D']
+            ))
+            self._fill_indicator_nans(df, indicator_columns)
             
         except Exception as e:
             print(f"⚠️ Indicator calculation warning: {e}")
         
         return df
 
+    def get_indicator_frame(self, symbol: str, timeframe: str, df: pd.DataFrame,
+                            custom_periods: Optional[Dict] = None) -> pd.DataFrame:
+        """Indicator frame memoized until a new bar/tick changes the source frame"""
+        if len(df) == 0:
+            return self.calculate_technical_indicators(df, custom_periods)
+            
+        # Full newest bar - S/R levels read high/low, which can move without the close changing
+        newest = tuple(float(df[col].iloc[0]) for col in ("open", "high", "low", "close"))
+        bar_key = (len(df), df["time"].iloc[0].value, newest)
+        key = (symbol, timeframe, bar_key, tuple(sorted((custom_periods or {}).items())))
+        with self._indicator_lock:
+            cached = self._indicator_cache.get(key)
+            if cached is not None:
+                self._indicator_cache.move_to_end(key)
+                return cached
+            
+        # Computed outside the lock - a concurrent miss on the same key just does the work twice
+        result = self.calculate_technical_indicators(df, custom_periods)
+        with self._indicator_lock:
+            self._indicator_cache[key] = result
+            while len(self._indicator_cache) > self._indicator_cache_size:
+                self._indicator_cache.popitem(last=False)
+        return result
+
     def _get_periods(self, custom_periods: Optional[Dict] = None) -> Dict:
         """Get indicator periods - custom if provided, otherwise defaults"""
         if not custom_periods:
@@ -357,14 +586,16 @@ class PyramidEngine:
         
         return periods
 
-    def _fill_indicator_nans(self, df: pd.DataFrame):
+    def _fill_indicator_nans(self, df: pd.DataFrame, indicator_columns: Optional[List[str]] = None):
         """Fill NaN values in indicator columns"""
-        indicator_columns = [col for col in df.columns if any(indicator in col for indicator in 
-                            ['SMA_', 'EMA_', 'MACD', 'RSI', 'BB_', 'Stoch_'])]
-        
-        for col in indicator_columns:
-            if col in df.columns:
-                df[col] = df[col].ffill().bfill()
+        if indicator_columns is None:
+            indicator_columns = [col for col in df.columns if any(indicator in col for indicator in 
+                                ['SMA_', 'EMA_', 'MACD', 'RSI', 'BB_', 'Stoch_'])]
+        
+        # One block-wise fill over all indicator columns instead of one per column
+        indicator_columns = [col for col in indicator_columns if col in df.columns]
+        if indicator_columns:
+            df[indicator_columns] = df[indicator_columns].ffill().bfill()
 
     def get_current_indicator_values(self, df: pd.DataFrame) -> Dict[str, float]:
         """Get current/latest values for all calculated indicators"""
@@ -390,79 +621,57 @@ class PyramidEngine:
             return indicators_data
             
         time_data = df['time'].tolist()
+        # Epoch milliseconds for every row, converted once for all series
+        ts_ms = df['time'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+
+        def points(col: str) -> List[Dict[str, Any]]:
+            """Chart.js {x, y} points for a column, NaN rows dropped"""
+            vals = df[col].to_numpy(dtype=np.float64)
+            mask = ~np.isnan(vals)
+            return [{'x': x, 'y': y} for x, y in zip(ts_ms[mask].tolist(), vals[mask].tolist())]
         
         # Format all SMA lines
         sma_columns = [col for col in df.columns if col.startswith('SMA_')]
         for col in sma_columns:
             period = col.replace('SMA_', '')
-            indicators_data[f'sma_{period}'] = [
-                {'x': time_data[i].timestamp() * 1000, 'y': float(df[col].iloc[i])} 
-                for i in range(len(df)) if not pd.isna(df[col].iloc[i])
-            ]
+            indicators_data[f'sma_{period}'] = points(col)
         
         # Format all EMA lines  
         ema_columns = [col for col in df.columns if col.startswith('EMA_')]
         for col in ema_columns:
             period = col.replace('EMA_', '')
-            indicators_data[f'ema_{period}'] = [
-                {'x': time_data[i].timestamp() * 1000, 'y': float(df[col].iloc[i])}
-                for i in range(len(df)) if not pd.isna(df[col].iloc[i])
-            ]
+            indicators_data[f'ema_{period}'] = points(col)
         
         # Format RSI
         if 'RSI' in df.columns:
-            indicators_data['rsi'] = [
-                {'x': time_data[i].timestamp() * 1000, 'y': float(df['RSI'].iloc[i])}
-                for i in range(len(df)) if not pd.isna(df['RSI'].iloc[i])
-            ]
+            indicators_data['rsi'] = points('RSI')
         
         # Format MACD
         if 'MACD' in df.columns:
-            indicators_data['macd'] = [
-                {'x': time_data[i].timestamp() * 1000, 'y': float(df['MACD'].iloc[i])}
-                for i in range(len(df)) if not pd.isna(df['MACD'].iloc[i])
-            ]
+            indicators_data['macd'] = points('MACD')
             
         if 'MACD_Signal' in df.columns:
-            indicators_data['macd_signal'] = [
-                {'x': time_data[i].timestamp() * 1000, 'y': float(df['MACD_Signal'].iloc[i])}
-                for i in range(len(df)) if not pd.isna(df['MACD_Signal'].iloc[i])
-            ]
+            indicators_data['macd_signal'] = points('MACD_Signal')
         
         # ENHANCED: Format Bollinger Bands as grouped object
         if all(col in df.columns for col in ['BB_Upper', 'BB_Middle', 'BB_Lower']):
             indicators_data['bollinger'] = {
-                'upper': [
-                    {'x': time_data[i].timestamp() * 1000, 'y': float(df['BB_Upper'].iloc[i])}
-                    for i in range(len(df)) if not pd.isna(df['BB_Upper'].iloc[i])
-                ],
-                'middle': [
-                    {'x': time_data[i].timestamp() * 1000, 'y': float(df['BB_Middle'].iloc[i])}
-                    for i in range(len(df)) if not pd.isna(df['BB_Middle'].iloc[i])
-                ],
-                'lower': [
-                    {'x': time_data[i].timestamp() * 1000, 'y': float(df['BB_Lower'].iloc[i])}
-                    for i in range(len(df)) if not pd.isna(df['BB_Lower'].iloc[i])
-                ]
+                'upper': points('BB_Upper'),
+                'middle': points('BB_Middle'),
+                'lower': points('BB_Lower')
             }
         
         # ADDED: Format Stochastic Oscillator
         if 'Stoch_%K' in df.columns:
-            indicators_data['stoch_k'] = [
-                {'x': time_data[i].timestamp() * 1000, 'y': float(df['Stoch_%K'].iloc[i])}
-                for i in range(len(df)) if not pd.isna(df['Stoch_%K'].iloc[i])
-            ]
+            indicators_data['stoch_k'] = points('Stoch_%K')
             
         if 'Stoch_%D' in df.columns:
-            indicators_data['stoch_d'] = [
-                {'x': time_data[i].timestamp() * 1000, 'y': float(df['Stoch_%D'].iloc[i])}
-                for i in range(len(df)) if not pd.isna(df['Stoch_%D'].iloc[i])
-            ]
+            indicators_data['stoch_d'] = points('Stoch_%D')
         
         # ADDED: Format Support/Resistance Levels
-        if 'Support_Levels' in df.columns and 'Resistance_Levels' in df.columns:
-            support_levels = df['Support_Levels'].iloc[0] if len(df) > 0 else []
-            resistance_levels = df['Resistance_Levels'].iloc[0] if len(df) > 0 else []
+        if 'support_levels' in df.attrs and 'resistance_levels' in df.attrs:
+            support_levels = df.attrs['support_levels']
+            resistance_levels = df.attrs['resistance_levels']
             
             indicators_data['support_resistance'] = {
                 'support': support_levels,
@@ -483,22 +692,34 @@ class PyramidEngine:
         if len(df) < lookback * 2:
             return levels
             
-        for i in range(lookback, len(df) - lookback):
-            # Swing High detection (Resistance)
-            if all(df['high'].iloc[i] > df['high'].iloc[i-j] for j in range(1, lookback+1)) and \
-               all(df['high'].iloc[i] > df['high'].iloc[i+j] for j in range(1, lookback+1)):
-                level = float(df['high'].iloc[i])
-                # Avoid duplicate levels (within 0.1% range)
-                if not any(abs(level - existing) / existing < 0.001 for existing in levels['resistance']):
-                    levels['resistance'].append(level)
-            
-            # Swing Low detection (Support)  
-            if all(df['low'].iloc[i] < df['low'].iloc[i-j] for j in range(1, lookback+1)) and \
-               all(df['low'].iloc[i] < df['low'].iloc[i+j] for j in range(1, lookback+1)):
-                level = float(df['low'].iloc[i])
-                # Avoid duplicate levels (within 0.1% range)
-                if not any(abs(level - existing) / existing < 0.001 for existing in levels['support']):
-                    levels['support'].append(level)
+        high = pd.Series(df['high'].to_numpy(dtype=np.float64))
+        low = pd.Series(df['low'].to_numpy(dtype=np.float64))
+        
+        # Swing High detection (Resistance) - strictly above the `lookback` bars on each side
+        # rolling().shift(1) covers bars i-lookback..i-1, shift(-lookback) covers i+1..i+lookback
+        swing_high = (high > high.rolling(lookback).max().shift(1)) & \
+                     (high > high.rolling(lookback).max().shift(-lookback))
+        
+        # Swing Low detection (Support)
+        swing_low = (low < low.rolling(lookback).min().shift(1)) & \
+                    (low < low.rolling(lookback).min().shift(-lookback))
+        
+        def add_level(found: List[float], level: float):
+            """Insert into sorted `found` unless within 0.1% of an existing level"""
+            # |level - existing| / existing grows moving away from level, so the two neighbours decide
+            pos = bisect.bisect_left(found, level)
+            if pos > 0 and (level - found[pos - 1]) / found[pos - 1] < 0.001:
+                return
+            if pos < len(found) and (found[pos] - level) / found[pos] < 0.001:
+                return
+            found.insert(pos, level)
+        
+        # Avoid duplicate levels (within 0.1% range) - only the few swing candidates are visited
+        for level in high[swing_high].tolist():
+            add_level(levels['resistance'], level)
+                
+        for level in low[swing_low].tolist():
+            add_level(levels['support'], level)
         
         # Sort and keep strongest levels (limit to 5 each)
         levels['support'] = sorted(levels['support'])[-5:]
@@ -515,21 +736,20 @@ class PyramidEngine:
             return []
             
         df = data[timeframe]
-        chart_data = []
-        
-        for _, row in df.iterrows():
-            chart_data.append({
-                'x': row["time"].timestamp() * 1000,  # JavaScript timestamp
-                'y': float(row["close"]),  # Use close price for line/area charts
-                'o': float(row["open"]),
-                'h': float(row["high"]),
-                'l': float(row["low"]),
-                'c': float(row["close"]),
-                'volume': int(row.get("tick_volume", 0))
-            })
-        
-        chart_data.reverse()  # Oldest first for charts
-        return chart_data
+        
+        # Columns pulled out once, reversed so the list comes out oldest first for charts
+        ts_ms = df["time"].to_numpy().astype("datetime64[ms]").astype(np.int64)[::-1].tolist()  # JavaScript timestamp
+        opens = df["open"].to_numpy(dtype=np.float64)[::-1].tolist()
+        highs = df["high"].to_numpy(dtype=np.float64)[::-1].tolist()
+        lows = df["low"].to_numpy(dtype=np.float64)[::-1].tolist()
+        closes = df["close"].to_numpy(dtype=np.float64)[::-1].tolist()
+        volumes = (df["tick_volume"].to_numpy().astype(np.int64)[::-1].tolist()
+                   if "tick_volume" in df.columns else [0] * len(df))
+        
+        return [
+            {'x': x, 'y': c, 'o': o, 'h': h, 'l': l, 'c': c, 'volume': v}  # y = close for line/area charts
+            for x, o, h, l, c, v in zip(ts_ms, opens, highs, lows, closes, volumes)
+        ]
 
     # ===========================================================
     # 💾 DATA PERSISTENCE
@@ -543,14 +763,20 @@ class PyramidEngine:
             
         self.latest_pyramid = pyramid_data
         
-        # Save to main JSON file
-        with open(self.json_filename, "w", encoding="utf-8") as f:
-            json.dump(pyramid_data, f, indent=2, ensure_ascii=False)
+        # Serialize once, compact - both files are read by code, not people
+        payload = json_codec.dumps_bytes(pyramid_data)
+        
+        # Save to main JSON file - atomic replace so readers never see a half-written file
+        tmp_path = self.json_filename + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, self.json_filename)
             
-        # Save to dashboard data file
+        # Save to dashboard data file - plain byte copy, no second serialization,
+        # swapped in atomically so its mtime/ETag only changes on a complete file
         dashboard_path = os.path.join("dashboard", "data.json")
-        with open(dashboard_path, "w", encoding="utf-8") as f:
-            json.dump(pyramid_data, f, indent=2, ensure_ascii=False)
+        shutil.copyfile(self.json_filename, dashboard_path + ".tmp")
+        os.replace(dashboard_path + ".tmp", dashboard_path)
             
         print(f"💾 Pyramid data saved: {len(pyramid_data.get('blocks', []))} blocks")
 
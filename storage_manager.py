@@ -2,35 +2,83 @@
 # 💾 STORAGE LAYER - SIMPLIFIED DATA PERSISTENCE
 # ===============================================================
 
-import json
 import os
+import threading
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional
 import config
+import json_codec
+
+_LINE_IO_BUFFER = 1 << 16  # 64 KiB - alert JSONL is read/written line by line
 
 class StorageLayer:
     def __init__(self):
         self.data_dir = "data"
         self.settings_file = os.path.join(self.data_dir, "user_settings.json")
+        self.alerts_file = os.path.join(self.data_dir, "alerts.jsonl")  # one JSON object per line
+        self._pyramid_paths = {}  # symbol -> pyramid file path, joined once
+        
+        # Parsed settings cache - revalidated against the file's mtime
+        self._settings_cache = None
+        self._settings_mtime = None
+        
+        # Alerts list - parsed once, then kept in step with save_alert()
+        self._alerts_list = None
+        self._last_alert_ns = 0  # alert IDs are nanosecond stamps, bumped so they never repeat
+        
+        # Debounced pyramid writer - newest pending pyramid per symbol, flushed by a daemon thread
+        self.coalesce_ms = 200
+        self._pending_writes = {}    # symbol -> latest pyramid_data
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending_event = threading.Event()
+        self._writer_thread = None
+        
         self._ensure_directories()
+        self._migrate_legacy_alerts()
         print("💾 Storage Layer initialized")
 
     def _ensure_directories(self):
         """Create necessary directories"""
         os.makedirs(self.data_dir, exist_ok=True)
 
+    def _migrate_legacy_alerts(self):
+        """One-time conversion of the old alerts.json array into alerts.jsonl"""
+        legacy_file = os.path.join(self.data_dir, "alerts.json")
+        if not os.path.exists(legacy_file) or os.path.exists(self.alerts_file):
+            return
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                alerts = json_codec.loads(f.read())
+            with open(self.alerts_file, 'wb', buffering=_LINE_IO_BUFFER) as f:
+                f.writelines(json_codec.dumps_bytes(alert) + b'\n' for alert in alerts)
+            os.replace(legacy_file, legacy_file + ".migrated")
+            print(f"🔄 Migrated {len(alerts)} alerts to {os.path.basename(self.alerts_file)}")
+        except Exception as e:
+            print(f"⚠️ Error migrating alerts: {e}")
+
     # ===========================================================
     # 🎛️ USER SETTINGS MANAGEMENT
     # ===========================================================
     def load_user_settings(self) -> Dict[str, Any]:
-        """Load user settings from file or return defaults"""
+        """Load user settings from file or return defaults - cached until the file changes"""
         try:
-            if os.path.exists(self.settings_file):
+            try:
+                mtime = os.stat(self.settings_file).st_mtime  # one stat - doubles as the existence check
+            except FileNotFoundError:
+                mtime = None
+            if self._settings_cache is not None and mtime == self._settings_mtime:
+                return self._settings_cache.copy()
+            
+            settings = config.DEFAULT_SETTINGS.copy()
+            if mtime is not None:
                 with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    saved_settings = json.load(f)
-                    settings = config.DEFAULT_SETTINGS.copy()
-                    settings.update(saved_settings)
-                    return settings
+                    settings.update(json_codec.loads(f.read()))
+            
+            self._settings_cache = settings
+            self._settings_mtime = mtime
+            return settings.copy()
         except Exception as e:
             print(f"⚠️ Error loading settings: {e}")
         
@@ -39,8 +87,15 @@ class StorageLayer:
     def save_user_settings(self, settings: Dict[str, Any]) -> bool:
         """Save user settings to file"""
         try:
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(settings, f, indent=2, ensure_ascii=False)
+            payload = json_codec.dumps_bytes(settings, indent=True)  # one write(), no str/encode round trip
+            with open(self.settings_file, 'wb') as f:
+                f.write(payload)
+            
+            # Refresh the cache from what was just written - no re-read on the next load
+            merged = config.DEFAULT_SETTINGS.copy()
+            merged.update(settings)
+            self._settings_cache = merged
+            self._settings_mtime = os.stat(self.settings_file).st_mtime
             print("💾 User settings saved")
             return True
         except Exception as e:
@@ -51,14 +106,52 @@ class StorageLayer:
     # 🏗️ PYRAMID DATA STORAGE - SIMPLIFIED
     # ===========================================================
     def save_pyramid_data(self, pyramid_data: Dict[str, Any]):
-        """Save pyramid data to JSON file - Simple overwrite"""
+        """Queue pyramid data for writing - bursts per symbol collapse into one file write"""
+        symbol = pyramid_data.get('symbol', 'unknown')
+        with self._pending_lock:
+            self._pending_writes[symbol] = pyramid_data
+            if self._writer_thread is None:
+                self._writer_thread = threading.Thread(target=self._pyramid_writer_loop, name="PyramidWriter", daemon=True)
+                self._writer_thread.start()
+        self._pending_event.set()
+        return True
+
+    def flush_pending_writes(self):
+        """Write every queued pyramid now (also called on shutdown)"""
+        with self._pending_lock:
+            pending = self._pending_writes
+            self._pending_writes = {}
+            self._pending_event.clear()
+        
+        for symbol, pyramid_data in pending.items():
+            self._write_pyramid_file(symbol, pyramid_data)
+
+    def _pyramid_writer_loop(self):
+        """Wait for queued pyramids, let a burst settle, then flush the newest versions"""
+        while True:
+            self._pending_event.wait()
+            time.sleep(self.coalesce_ms / 1000)
+            self.flush_pending_writes()
+
+    def _pyramid_path(self, symbol: str) -> str:
+        """Path of a symbol's pyramid file"""
+        filepath = self._pyramid_paths.get(symbol)
+        if filepath is None:
+            filepath = self._pyramid_paths[symbol] = os.path.join(self.data_dir, f"pyramid_{symbol}.json")
+        return filepath
+
+    def _write_pyramid_file(self, symbol: str, pyramid_data: Dict[str, Any]) -> bool:
+        """Save pyramid data to JSON file - atomic overwrite"""
         try:
-            symbol = pyramid_data.get('symbol', 'unknown')
-            filename = f"pyramid_{symbol}.json"
-            filepath = os.path.join(self.data_dir, filename)
+            filepath = self._pyramid_path(symbol)
+            filename = os.path.basename(filepath)
+            tmp_path = filepath + ".tmp"
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(pyramid_data, f, indent=2, ensure_ascii=False)
+            payload = json_codec.dumps_bytes(pyramid_data)  # compact - only the dashboard reads it
+            with self._write_lock:
+                with open(tmp_path, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_path, filepath)
             
             print(f"💾 Pyramid data saved: {filename}")
             return True
@@ -70,11 +163,10 @@ class StorageLayer:
     def load_pyramid_for_symbol(self, symbol: str) -> Optional[Dict[str, Any]]:
         """Load pyramid data for specific symbol"""
         try:
-            filename = f"pyramid_{symbol}.json"
-            filepath = os.path.join(self.data_dir, filename)
-            if os.path.exists(filepath):
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            with open(self._pyramid_path(symbol), 'r', encoding='utf-8') as f:
+                return json_codec.loads(f.read())
+        except FileNotFoundError:
+            return None
         except Exception as e:
             print(f"⚠️ Error loading pyramid for {symbol}: {e}")
         
@@ -86,15 +178,19 @@ class StorageLayer:
     def save_alert(self, alert_data: Dict[str, Any]):
         """Save trading alert"""
         try:
-            alerts_file = os.path.join(self.data_dir, "alerts.json")
-            alerts = self.load_alerts()
+            if self._alerts_list is None:
+                self.load_alerts()
             
-            alert_data['id'] = datetime.now().strftime("%Y%m%d%H%M%S")
-            alert_data['created'] = datetime.now().isoformat()
-            alerts.append(alert_data)
+            # One clock read for both fields - IDs stay unique even for alerts in the same second
+            ts = max(time.time_ns(), self._last_alert_ns + 1)
+            self._last_alert_ns = ts
+            alert_data['id'] = str(ts)
+            alert_data['created'] = datetime.fromtimestamp(ts / 1e9).isoformat()
             
-            with open(alerts_file, 'w', encoding='utf-8') as f:
-                json.dump(alerts, f, indent=2, ensure_ascii=False)
+            # Append one line - constant-size write regardless of alert count
+            with open(self.alerts_file, 'ab') as f:
+                f.write(json_codec.dumps_bytes(alert_data) + b'\n')
+            self._alerts_list.append(alert_data)
                 
             print(f"🔔 Alert saved: {alert_data.get('message', 'Unknown')}")
             return True
@@ -104,16 +200,26 @@ class StorageLayer:
             return False
 
     def load_alerts(self) -> list:
-        """Load all alerts"""
-        try:
-            alerts_file = os.path.join(self.data_dir, "alerts.json")
-            if os.path.exists(alerts_file):
-                with open(alerts_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except:
-            pass
+        """Load all alerts - file is parsed on first use only"""
+        if self._alerts_list is None:
+            self._alerts_list = list(self._iter_alert_lines())
         
-        return []
+        return list(self._alerts_list)
+
+    def _iter_alert_lines(self):
+        """Stream alerts from the JSONL file, skipping blank or damaged lines"""
+        try:  # a missing file is just an OSError here - no separate exists() check
+            with open(self.alerts_file, 'r', encoding='utf-8', buffering=_LINE_IO_BUFFER) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json_codec.loads(line)
+                    except ValueError:
+                        continue
+        except OSError:
+            return
 
 # Singleton instance
 storage_layer = StorageLayer()
\ No newline at end of file
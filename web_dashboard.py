@@ -1,15 +1,72 @@
 # ===============================================================
 # WEB DASHBOARD - FLASK SERVER & API INTERFACE - DYNAMIC PERIODS
 # ===============================================================
-from flask import Flask, jsonify, render_template, send_from_directory, request
+from flask import Flask, Response, jsonify, render_template, send_from_directory, request
+from flask.json.provider import DefaultJSONProvider
+import hashlib
 import threading
+from functools import lru_cache
+from urllib.parse import parse_qsl
 import webbrowser
 import time
+from datetime import datetime
 import os
 from typing import Dict, Any
 import config
+import json_codec
 import pandas as pd
 
+try:
+    from waitress import serve as waitress_serve
+except ImportError:  # waitress is optional - werkzeug's threaded server is the fallback
+    waitress_serve = None
+
+try:
+    from flask_compress import Compress
+except ImportError:  # Flask-Compress is optional - responses go out uncompressed
+    Compress = None
+
+@lru_cache(maxsize=256)
+def _parse_custom_periods(query_string: bytes) -> tuple:
+    """Parse indicator period params from a raw query string - memoized per distinct query"""
+    custom_periods = {}
+    seen = set()
+    
+    # Extract all period parameters from request (first value per key, like request.args)
+    for key, value in parse_qsl(query_string.decode('utf-8', 'replace'), keep_blank_values=True):
+        if key in seen:
+            continue
+        seen.add(key)
+        # Plain *_period keys plus multiple instances (sma_period_1, sma_period_2, etc.)
+        if key.endswith('_period') or '_period_' in key:
+            try:
+                custom_periods[key] = int(value)
+            except (ValueError, TypeError):
+                continue
+    
+    return tuple(custom_periods.items())
+
+@lru_cache(maxsize=512)
+def _canonical_pair(pair: str) -> str:
+    """'eur/usd' -> 'EURUSD', 'eurusd.pro' -> 'EURUSD.pro' - memoized, the dashboard polls the same few pairs"""
+    base, dot, suffix = pair.replace('/', '').partition('.')
+    return base.upper() + dot + suffix
+
+class OrjsonJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider routed through json_codec - jsonify() gets orjson speed"""
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return json_codec.dumps(obj, sort_keys=self.sort_keys, default=self.default)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        return json_codec.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """jsonify() - orjson bytes go straight into the body, no str encode/decode round trip"""
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = json_codec.dumps_bytes(obj, indent=indent, sort_keys=self.sort_keys, default=self.default)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
 class WebDashboard:
     def __init__(self):
         # Flask app configuration
@@ -21,6 +78,16 @@ class WebDashboard:
         self.mt5_connector = None
         self.pyramid_engine = None
         self.main_launcher = None  # ADDED: Reference to main launcher
+        
+        # Serialized API payloads: key -> (source object, etag, body) - reused while the source is unchanged
+        self._pyramid_payloads = {}
+        self._chart_payloads = {}
+        self._payloads_max = 64  # per cache - cleared when full, keys come from request args
+        self._chart_payloads_lock = threading.Lock()  # guards both caches - collector re-encodes while request threads read
+        
+        # /api/health snapshot: (monotonic time, response fields) - refreshed every health_ttl seconds
+        self.health_ttl = 2.0
+        self._health_cache = (float('-inf'), {})
      
         print("Web Dashboard initialized")
 
@@ -43,6 +110,15 @@ class WebDashboard:
             return
          
         self.app = Flask(__name__, template_folder="dashboard", static_folder="dashboard")
+        self.app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 60  # dashboard assets - short browser cache
+        if json_codec.orjson is not None:
+            self.app.json = OrjsonJSONProvider(self.app)
+        if Compress is not None:
+            # Gzip JSON bodies (chart data is tens of KB per poll); tiny responses aren't worth it
+            self.app.config['COMPRESS_MIMETYPES'] = ['application/json']
+            self.app.config['COMPRESS_MIN_SIZE'] = 1024
+            self.app.config['COMPRESS_ALGORITHM'] = 'gzip'
+            Compress(self.app)
         self._setup_routes()
         self._create_dashboard_structure()
         self.setup_done = True
@@ -56,6 +132,11 @@ class WebDashboard:
         def index():
             return render_template('index.html')
 
+        @self.app.route('/data.json')
+        def serve_data_json():
+            # Conditional (ETag/Last-Modified) so repeat polls get 304 without a disk read
+            return send_from_directory('dashboard', 'data.json', conditional=True, max_age=1)
+
         @self.app.route('/<path:filename>')
         def serve_static(filename):
             return send_from_directory('dashboard', filename)
@@ -66,14 +147,24 @@ class WebDashboard:
             """Get current pyramid data - FIXED: Uses pyramid engine cache"""
             try:
                 # Get current user settings from request
-                pair = request.args.get('pair', 'EUR/USD').replace('/', '')
+                pair = _canonical_pair(request.args.get('pair', 'EUR/USD'))
                 pyramid_style = request.args.get('pyramid_style', 'daily')
                 
                 # FIXED: Use multi-symbol cache instead of waiting for MT5
                 cached_pyramid = self.pyramid_engine.get_pyramid_for_symbol(pair)
                 
+                # Serialize once per pyramid object - unchanged polls get 304 via ETag
+                with self._chart_payloads_lock:
+                    payload = self._pyramid_payloads.get(pair)
+                if payload is None or payload[0] is not cached_pyramid:
+                    payload = (cached_pyramid,) + self._etag_body(cached_pyramid)
+                    with self._chart_payloads_lock:
+                        if len(self._pyramid_payloads) >= self._payloads_max and pair not in self._pyramid_payloads:
+                            self._pyramid_payloads.clear()
+                        self._pyramid_payloads[pair] = payload
+                
                 # Return cached pyramid data immediately
-                return jsonify(cached_pyramid)
+                return self._conditional_json(payload[1], payload[2])
                 
             except Exception as e:
                 return jsonify({"error": f"Pyramid API error: {str(e)}"}), 500
@@ -83,10 +174,10 @@ class WebDashboard:
             """Get chart data for specific timeframe - FIXED: Uses pyramid engine cache"""
             try:
                 # Get current user settings
-                pair = request.args.get('pair', 'EUR/USD').replace('/', '')
+                pair = _canonical_pair(request.args.get('pair', 'EUR/USD'))
                 
                 # FIXED: Use cached data from pyramid engine multi-symbol cache
-                cached_raw_data = self.pyramid_engine.get_raw_data_for_symbol(pair)
+                cached_raw_data = self._get_raw_data_with_timeframe(pair, timeframe)
                 
                 if not cached_raw_data:
                     return jsonify({"error": "No chart data available yet - please wait for initial load"}), 404
@@ -94,34 +185,15 @@ class WebDashboard:
                 if timeframe not in cached_raw_data:
                     return jsonify({"error": f"Timeframe {timeframe} not available in cached data"}), 404
                 
-                # FIXED: Extract user periods from request
-                custom_periods = self._extract_custom_periods(request)
-             
-                chart_data = self.pyramid_engine.get_chart_data(
-                    cached_raw_data,
-                    timeframe
-                )
-             
-                # FIXED: Calculate indicators with DYNAMIC periods
-                df_with_indicators = self.pyramid_engine.calculate_technical_indicators(
-                    cached_raw_data[timeframe].copy(),
-                    custom_periods
-                )
-
-                # FIXED: Get REAL indicator values with dynamic periods
-                real_indicator_values = self.pyramid_engine.get_current_indicator_values(df_with_indicators)
-                
-                # FIXED: Format indicator data for chart with dynamic periods
-                indicators_data = self.pyramid_engine.get_indicator_chart_data(df_with_indicators, timeframe)
-
-                return jsonify({
-                    "symbol": pair,
-                    "timeframe": timeframe,
-                    "data": chart_data,
-                    "total_candles": len(chart_data),
-                    "indicators": real_indicator_values,  # FIXED: Dynamic period values
-                    "indicators_data": indicators_data    # FIXED: Dynamic period chart data
-                })
+                # Same frame + same query -> same payload; skip indicators and serialization entirely
+                source_df = cached_raw_data[timeframe]
+                payload_key = (pair, timeframe, request.query_string)
+                with self._chart_payloads_lock:
+                    payload = self._chart_payloads.get(payload_key)
+                if payload is None or payload[0] is not source_df:
+                    # Not pre-encoded by the collector yet (new query or first poll) - encode here
+                    payload = self._store_chart_payload(payload_key, cached_raw_data)
+                return self._conditional_json(payload[1], payload[2])
              
             except Exception as e:
                 return jsonify({"error": f"Chart error: {str(e)}"}), 500
@@ -161,14 +233,10 @@ class WebDashboard:
         @self.app.route('/api/health')
         def api_health():
             """Health check endpoint"""
-            mt5_health = self.mt5_connector.health_check() if self.mt5_connector else {}
             return jsonify({
                 "status": "healthy",
                 "timestamp": time.strftime('%Y-%m-%d %H:%M:%S'),
-                "symbol": self.mt5_connector.symbol if self.mt5_connector else "Unknown",
-                "pyramid_structure": self.pyramid_engine.pyramid_structure if self.pyramid_engine else [],
-                "cached_symbols": self.pyramid_engine.get_cached_symbols() if self.pyramid_engine else [],  # NEW: Show cached symbols
-                "mt5": mt5_health
+                **self._health_snapshot()
             })
 
         # ==================== UPDATE SETTINGS ROUTE - FIXED: SYMBOL SWITCHING ====================
@@ -180,6 +248,10 @@ class WebDashboard:
                 if not settings:
                     return jsonify({"error": "No settings provided"}), 400
                 
+                # Same spelling as the ?pair= cache keys used by the read endpoints
+                if settings.get('symbol'):
+                    settings['symbol'] = _canonical_pair(settings['symbol'])
+                
                 print(f"🔄 Processing symbol change to: {settings.get('symbol')}")
                 
                 # ❌ REMOVED: Cache clearing - keep cache intact!
@@ -197,41 +269,24 @@ class WebDashboard:
                     pyramid_style=settings.get('pyramid_style', 'daily'),
                     utc_offset=settings.get('utc_offset', 0)
                 )
+                self.invalidate_health_snapshot()  # symbol / structure just changed
                 
                 # FIXED: Update main_launcher symbol if available
                 if self.main_launcher:
                     self.main_launcher.symbol = self.mt5_connector.symbol
                     print(f"🔄 Main launcher symbol updated to: {self.main_launcher.symbol}")
+                    
+                    # Fetch runs on the collector thread - respond now, the client polls /api/pyramid
+                    self.main_launcher.queue_settings_change(settings)
+                    return jsonify({
+                        "status": "accepted",
+                        "message": f"Settings updated: {settings.get('symbol')}, {settings.get('pyramid_style')}",
+                        "pyramid_structure": pyramid_structure
+                    }), 202
                 
-                # FIXED: Trigger immediate data fetch for new symbol
+                # No collector running (standalone dashboard) - fetch inline
                 try:
-                    print(f"🚀 Immediate fetch triggered for: {self.mt5_connector.symbol}")
-                    raw_data = self.mt5_connector.fetch_all_timeframes(self.mt5_connector.symbol)
-                    
-                    if raw_data:
-                        # Process data through pyramid engine
-                        pyramid_data = {}
-                        for tf in raw_data:
-                            if not raw_data[tf].empty:
-                                pyramid_data[tf] = self.pyramid_engine.calculate_momentum_analysis(raw_data[tf])
-                        
-                        # Build pyramid JSON
-                        pyramid_json = self.pyramid_engine.build_pyramid_json(pyramid_data)
-                        
-                        # Save to storage
-                        self.pyramid_engine.save_to_json(pyramid_json)
-                        
-                        # FIXED: Update multi-symbol cache with new data
-                        self.pyramid_engine.update_symbol_data(
-                            self.mt5_connector.symbol, 
-                            raw_data, 
-                            pyramid_json
-                        )
-                        
-                        print(f"✅ Immediate fetch completed: {len(pyramid_json.get('blocks', []))} blocks, {len(raw_data)} TFs")
-                    else:
-                        print("❌ Immediate fetch failed - no data returned")
-                        
+                    self._fetch_symbol_now()
                 except Exception as fetch_error:
                     print(f"⚠️ Immediate fetch failed: {fetch_error}")
                     return jsonify({"error": f"Fetch failed: {str(fetch_error)}"}), 500
@@ -245,29 +300,147 @@ class WebDashboard:
             except Exception as e:
                 return jsonify({"error": f"Settings update failed: {str(e)}"}), 500
 
-    # ==================== FIXED: DYNAMIC PERIODS EXTRACTION ====================
-    def _extract_custom_periods(self, request):
-        """Extract custom indicator periods from request parameters"""
-        custom_periods = {}
+    def _health_snapshot(self) -> Dict[str, Any]:
+        """Symbol, structure, cached symbols and MT5 health - reused for health_ttl seconds across polls"""
+        now = time.monotonic()
+        checked_at, snapshot = self._health_cache
+        if now - checked_at > self.health_ttl:
+            snapshot = {
+                "symbol": self.mt5_connector.symbol if self.mt5_connector else "Unknown",
+                "pyramid_structure": tuple(self.pyramid_engine.pyramid_structure) if self.pyramid_engine else (),
+                "cached_symbols": tuple(self.pyramid_engine.get_cached_symbols()) if self.pyramid_engine else (),  # NEW: Show cached symbols
+                "mt5": self.mt5_connector.health_check() if self.mt5_connector else {}
+            }
+            self._health_cache = (now, snapshot)
+        return snapshot
+
+    def invalidate_health_snapshot(self):
+        """Force the next /api/health to rebuild its snapshot"""
+        self._health_cache = (float('-inf'), {})
+
+    def _fetch_symbol_now(self):
+        """Fetch, analyse and cache the current symbol on the calling thread"""
+        symbol = self.mt5_connector.symbol
+        fetched_at = datetime.now().isoformat()  # one timestamp for this update
+        print(f"🚀 Immediate fetch triggered for: {symbol}")
+        raw_data = self.mt5_connector.fetch_all_timeframes(symbol)
         
-        # Extract all period parameters from request
-        for key, value in request.args.items():
-            if key.endswith('_period'):
-                try:
-                    period_value = int(value)
-                    custom_periods[key] = period_value
-                except (ValueError, TypeError):
-                    continue
-                    
-            # Handle multiple instances (sma_period_1, sma_period_2, etc.)
-            elif '_period_' in key:
-                try:
-                    period_value = int(value)
-                    custom_periods[key] = period_value
-                except (ValueError, TypeError):
-                    continue
+        if not raw_data:
+            print("❌ Immediate fetch failed - no data returned")
+            return
+        
+        # Process data through pyramid engine
+        pyramid_data = {}
+        for tf, df in raw_data.items():
+            if len(df) > 0:
+                pyramid_data[tf] = self.pyramid_engine.calculate_momentum_analysis(df)
+        
+        # Build pyramid JSON
+        pyramid_json = self.pyramid_engine.build_pyramid_json(pyramid_data, generated_at=fetched_at)
+        
+        # Save to storage
+        self.pyramid_engine.save_to_json(pyramid_json)
+        
+        # FIXED: Update multi-symbol cache with new data
+        self.pyramid_engine.update_symbol_data(symbol, raw_data, pyramid_json)
+        
+        print(f"✅ Immediate fetch completed: {len(pyramid_json.get('blocks', []))} blocks, {len(raw_data)} TFs")
+
+    # ==================== CHART PAYLOAD ENCODING ====================
+    def _store_chart_payload(self, payload_key: tuple, cached_raw_data: Dict[str, pd.DataFrame]) -> tuple:
+        """Build, encode and cache the /api/chart-data body for (pair, timeframe, query string)"""
+        pair, timeframe, query_string = payload_key
+        source_df = cached_raw_data[timeframe]
+        
+        # FIXED: Extract user periods from request
+        custom_periods = dict(_parse_custom_periods(query_string))
+     
+        chart_data = self.pyramid_engine.get_chart_data(
+            cached_raw_data,
+            timeframe
+        )
+     
+        # FIXED: Calculate indicators with DYNAMIC periods (memoized per bar, no frame copy)
+        df_with_indicators = self.pyramid_engine.get_indicator_frame(
+            pair,
+            timeframe,
+            source_df,
+            custom_periods
+        )
+
+        # FIXED: Get REAL indicator values with dynamic periods
+        real_indicator_values = self.pyramid_engine.get_current_indicator_values(df_with_indicators)
+        
+        # FIXED: Format indicator data for chart with dynamic periods
+        indicators_data = self.pyramid_engine.get_indicator_chart_data(df_with_indicators, timeframe)
+
+        etag, body = self._etag_body({
+            "symbol": pair,
+            "timeframe": timeframe,
+            "data": chart_data,
+            "total_candles": len(chart_data),
+            "indicators": real_indicator_values,  # FIXED: Dynamic period values
+            "indicators_data": indicators_data    # FIXED: Dynamic period chart data
+        })
+        payload = (source_df, etag, body)
+        with self._chart_payloads_lock:
+            if len(self._chart_payloads) >= self._payloads_max and payload_key not in self._chart_payloads:
+                self._chart_payloads.clear()
+            self._chart_payloads[payload_key] = payload
+        return payload
+
+    def _refresh_chart_payloads(self, symbol: str):
+        """Re-encode every chart payload the dashboard has asked for on this symbol (collector thread)"""
+        cached_raw_data = self.pyramid_engine.get_raw_data_for_symbol(symbol)
+        with self._chart_payloads_lock:
+            payload_keys = [key for key in self._chart_payloads if key[0] == symbol]
+        for payload_key in payload_keys:
+            timeframe = payload_key[1]
+            df = cached_raw_data.get(timeframe)
+            if df is None or len(df) == 0:
+                self._discard_chart_payload(payload_key)
+                continue
+            try:
+                self._store_chart_payload(payload_key, cached_raw_data)
+            except Exception as e:
+                self._discard_chart_payload(payload_key)
+                print(f"⚠️ Chart pre-encode failed for {symbol} {timeframe}: {e}")
+
+    def _discard_chart_payload(self, payload_key: tuple):
+        """Drop one cached chart payload"""
+        with self._chart_payloads_lock:
+            self._chart_payloads.pop(payload_key, None)
+
+    # ==================== ETAG PAYLOAD HELPERS ====================
+    def _etag_body(self, data: Any) -> tuple:
+        """Serialize like jsonify (sorted keys) and derive a content ETag"""
+        body = json_codec.dumps_bytes(data, sort_keys=True) + b"\n"
+        return hashlib.blake2b(body, digest_size=8).hexdigest(), body
+
+    def _conditional_json(self, etag: str, body: bytes) -> Response:
+        """JSON response that turns into 304 Not Modified when If-None-Match matches"""
+        # Flask-Compress tags gzipped responses as "<etag>:gzip" - accept that form too
+        if request.if_none_match.contains(etag) or request.if_none_match.contains(f"{etag}:gzip"):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response
+
+    # ==================== LAZY TIMEFRAME LOADING ====================
+    def _get_raw_data_with_timeframe(self, pair: str, timeframe: str) -> Dict[str, pd.DataFrame]:
+        """Get cached raw data for pair - fetches the timeframe from MT5 on first access"""
+        cached_raw_data = self.pyramid_engine.get_raw_data_for_symbol(pair)
+        
+        df = cached_raw_data.get(timeframe)
+        if (df is None or len(df) == 0) and self.mt5_connector and timeframe in config.ALL_TIMEFRAMES:
+            print(f"📥 Lazy-loading {pair} {timeframe} for dashboard")
+            fetched = self.mt5_connector.fetch_timeframe_data(pair, timeframe)
+            if len(fetched) > 0:
+                cached_raw_data = self.pyramid_engine.store_timeframe_data(pair, timeframe, fetched)
         
-        return custom_periods
+        return cached_raw_data
 
     # ===========================================================
     # DASHBOARD FILE STRUCTURE
@@ -297,9 +470,8 @@ class WebDashboard:
         }
      
         data_path = os.path.join("dashboard", "data.json")
-        import json
         with open(data_path, "w", encoding="utf-8") as f:
-            json.dump(initial_data, f, indent=2)
+            f.write(json_codec.dumps(initial_data, indent=True))
 
     # ===========================================================
     # SERVER CONTROL
@@ -308,11 +480,16 @@ class WebDashboard:
         """Start Flask server in a separate thread"""
         def run_flask():
             print(f"Starting Flask server on port {self.dashboard_port}...")
+            if waitress_serve is not None:
+                # Production WSGI server - chart and pyramid requests are served concurrently
+                waitress_serve(self.app, host='127.0.0.1', port=self.dashboard_port, threads=8)
+                return
             self.app.run(
                 host='127.0.0.1',
                 port=self.dashboard_port,
                 use_reloader=False,
-                debug=False
+                debug=False,
+                threaded=True
             )
      
         flask_thread = threading.Thread(target=run_flask, daemon=True)
@@ -335,6 +512,9 @@ class WebDashboard:
             # FIXED: Update multi-symbol cache instead of just single-symbol state
             symbol = pyramid_data.get('symbol', self.mt5_connector.symbol if self.mt5_connector else 'Unknown')
             self.pyramid_engine.update_symbol_data(symbol, raw_data, pyramid_data)
+            
+            # Encode chart responses here, off the request thread - polls become a dict lookup
+            self._refresh_chart_payloads(symbol)
          
             # Save to JSON for persistence
             self.pyramid_engine.save_to_json(pyramid_data)